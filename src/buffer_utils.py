@@ -0,0 +1,86 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Ring buffer berbasis array NumPy yang dialokasikan di awal untuk riwayat sinyal.
+
+    Setiap sampel ditulis dua kali (posisi i dan i + capacity), sehingga N sampel
+    terakhir selalu berupa slice kontigu dari storage dan dapat dikembalikan sebagai
+    view tanpa penyalinan. Append bernilai O(1) dan timestamp disimpan berdampingan.
+
+    Parameter:
+    - capacity: jumlah sampel maksimum yang disimpan
+    - channels: jumlah kanal per sampel (None untuk sinyal 1D, mis. 3 untuk RGB)
+    - dtype: tipe data sampel (float32 / float64)
+    """
+    def __init__(self, capacity: int, channels: int = None, dtype=np.float64):
+        self.capacity = int(capacity)
+        if self.capacity <= 0:
+            raise ValueError("capacity harus > 0")
+        self.channels = channels
+        shape = (2 * self.capacity,) if channels is None else (channels, 2 * self.capacity)
+        self._data = np.zeros(shape, dtype=dtype)
+        self._times = np.full(2 * self.capacity, np.nan)
+        self._head = 0   # slot tulis berikutnya (0..capacity-1)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self.latest(), dtype=dtype)
+
+    def append(self, value, timestamp: float = np.nan):
+        """
+        Menambahkan satu sampel (skalar atau vektor sepanjang `channels`) beserta timestamp-nya.
+        """
+        i = self._head
+        j = i + self.capacity
+        self._data[..., i] = value
+        self._data[..., j] = value
+        self._times[i] = timestamp
+        self._times[j] = timestamp
+        self._head = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        """
+        Mengosongkan buffer tanpa realokasi.
+        """
+        self._head = 0
+        self._count = 0
+
+    def _window(self, n):
+        n = self._count if n is None else max(0, min(int(n), self._count))
+        end = self._head + self.capacity
+        return end - n, end
+
+    def latest(self, n: int = None) -> np.ndarray:
+        """
+        Mengembalikan view N sampel terakhir, urut dari terlama ke terbaru.
+
+        Return:
+        - array (n,) untuk sinyal 1D atau (channels, n) untuk sinyal multi-kanal.
+          Hasil berupa view yang akan tertimpa oleh append berikutnya; gunakan
+          `.copy()` jika data perlu disimpan atau dipakai di thread lain.
+        """
+        start, end = self._window(n)
+        return self._data[..., start:end]
+
+    def timestamps(self, n: int = None) -> np.ndarray:
+        """
+        Mengembalikan view timestamp untuk N sampel terakhir (selaras dengan `latest`).
+        """
+        start, end = self._window(n)
+        return self._times[start:end]
+
+
+def as_signal_array(data) -> np.ndarray:
+    """
+    Mengubah masukan sinyal (RingBuffer, list, deque, atau array) menjadi np.ndarray.
+    RingBuffer dikembalikan sebagai view tanpa penyalinan.
+    """
+    if isinstance(data, RingBuffer):
+        return data.latest()
+    return np.asarray(data)
@@ -1,5 +1,9 @@
 import numpy as np
 import random
+import time
+import os
+import json
+from buffer_utils import as_signal_array
 
 def fitness_snr(signal):
     """
@@ -9,17 +13,41 @@ def fitness_snr(signal):
     snr = np.mean(signal)**2 / (np.std(signal)**2 + 1e-8)
     return -snr
 
-def bandpass_and_eval(signal, fs, apply_filter, param_set):
+def quantize_params(param_set, step=0.005):
+    """
+    Mengkuantisasi parameter filter menjadi key untuk tabel memo fitness.
+    Params:
+      param_set : tuple (lowcut, highcut, order)
+      step      : resolusi kuantisasi frekuensi cutoff (Hz)
+    Return:
+      key (tuple) : (lowcut terkuantisasi, highcut terkuantisasi, order integer)
+    """
+    lowcut, highcut, order = param_set
+    return (int(round(lowcut / step)), int(round(highcut / step)), int(order))
+
+def bandpass_and_eval(signal, fs, apply_filter, param_set, cache=None):
     """
     Menerapkan bandpass filter pada sinyal dan mengembalikan nilai fitness.
     Params:
-      signal       : sinyal 1D
+      signal       : sinyal 1D (array atau RingBuffer)
       fs           : frame rate
       apply_filter : fungsi filtering
       param_set    : tuple (lowcut, highcut, order)
+      cache        : dict memo opsional (key dari quantize_params) agar kandidat
+                     yang terkuantisasi sama tidak difilter ulang. Cache hanya
+                     valid untuk satu sinyal yang sama.
     Return:
       fitness (float)
     """
+    signal = as_signal_array(signal)
+    if cache is not None:
+        key = quantize_params(param_set)
+        if key in cache:
+            return cache[key]
+        fitness_value = bandpass_and_eval(signal, fs, apply_filter, param_set)
+        cache[key] = fitness_value
+        return fitness_value
+
     lowcut, highcut, order = param_set
     if lowcut >= highcut or order < 2 or order > 8:
         return 1e9  # penalti besar jika parameternya tidak valid
@@ -34,6 +62,54 @@ def bandpass_and_eval(signal, fs, apply_filter, param_set):
     except Exception:
         return 1e9
 
+def load_warm_start(path, key):
+    """
+    Membaca parameter terbaik dari optimasi sebelumnya untuk profil/sesi tertentu.
+    Params:
+      path : path file JSON penyimpanan
+      key  : nama profil/sesi (mis. "default/rppg")
+    Return:
+      list of np.ndarray (terbaru lebih dulu), kosong jika belum ada
+    """
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r") as f:
+            store = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [np.array(e["params"], dtype=float) for e in reversed(store.get(key, []))]
+
+def save_warm_start(path, key, params, score, keep=5):
+    """
+    Menyimpan parameter terbaik hasil optimasi ke file JSON untuk warm-start berikutnya.
+    Yang disimpan adalah `keep` hasil terbaru per key (bukan skor terendah), karena fitness
+    dari rekaman berbeda tidak sebanding; swarm menilai ulang seed pada sinyal saat ini.
+    Params:
+      path   : path file JSON penyimpanan
+      key    : nama profil/sesi
+      params : parameter terbaik (array-like)
+      score  : nilai fitness parameter tersebut (hanya informasi)
+      keep   : jumlah entri terbaru yang disimpan per key
+    """
+    store = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                store = json.load(f)
+        except (OSError, ValueError):
+            store = {}
+    entries = store.get(key, [])
+    entries.append({"params": [float(v) for v in params], "score": float(score)})
+    store[key] = entries[-keep:]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(store, f, indent=2)
+
+class _StopSearch(Exception):
+    """Sinyal internal untuk menghentikan pencarian (budget habis / dibatalkan)."""
+    pass
+
 def cat_swarm_optimize(
     objective_func,
     bounds,
@@ -41,55 +117,110 @@ def cat_swarm_optimize(
     max_iter=30,
     mixture_ratio=0.5,
     srd=0.2,
-    smp=5
+    smp=5,
+    max_evals=None,
+    time_budget=None,
+    patience=None,
+    tol=1e-6,
+    progress_callback=None,
+    stop_event=None,
+    init_cats=None,
+    seed_fraction=0.5
 ):
     """
     Implementasi dasar algoritma Cat Swarm Optimization (CSO).
+    Pencarian bersifat *anytime*: dapat dihentikan kapan saja (budget, konvergensi,
+    atau pembatalan) dan tetap mengembalikan parameter terbaik sejauh ini.
     Params:
-      objective_func : fungsi objektif yang akan diminimalkan
-      bounds         : list of tuples [(min1, max1), ...] untuk setiap dimensi
-      n_cats         : jumlah populasi kucing
-      max_iter       : jumlah iterasi
-      mixture_ratio  : rasio antara seeking dan tracking mode (0–1)
-      srd            : Seeking Range of the Dimension
-      smp            : Seeking Memory Pool (jumlah kandidat per kucing)
+      objective_func    : fungsi objektif yang akan diminimalkan
+      bounds            : list of tuples [(min1, max1), ...] untuk setiap dimensi
+      n_cats            : jumlah populasi kucing
+      max_iter          : jumlah iterasi
+      mixture_ratio     : rasio antara seeking dan tracking mode (0–1)
+      srd               : Seeking Range of the Dimension
+      smp               : Seeking Memory Pool (jumlah kandidat per kucing)
+      max_evals         : batas jumlah evaluasi fungsi objektif (None = tanpa batas)
+      time_budget       : batas waktu wall-clock dalam detik (None = tanpa batas)
+      patience          : berhenti jika best_score tidak membaik lebih dari `tol`
+                          selama `patience` iterasi berturut-turut (None = nonaktif)
+      tol               : ambang perbaikan minimum untuk early stopping
+      progress_callback : fungsi callback(iterasi, best_cat, best_score) tiap iterasi
+      stop_event        : objek dengan method is_set() (mis. threading.Event) untuk pembatalan
+      init_cats         : list parameter awal (warm-start) untuk menyemai sebagian populasi
+      seed_fraction     : porsi maksimum populasi yang disemai dari init_cats
     Return:
       best_cat (np.ndarray) : parameter terbaik
       best_score (float)    : nilai fitness terbaik
     """
     dim = len(bounds)
-    cats = [np.array([np.random.uniform(*b) for b in bounds]) for _ in range(n_cats)]
-    velocities = [np.zeros(dim) for _ in range(n_cats)]
-    fitness = [objective_func(c) for c in cats]
-    best_cat = cats[np.argmin(fitness)]
-    best_score = min(fitness)
+    start_time = time.monotonic()
+    state = {"evals": 0, "best_cat": None, "best_score": np.inf}
 
-    for it in range(max_iter):
-        for i in range(n_cats):
-            if random.random() < mixture_ratio:
-                # SEEKING MODE
-                pool = []
-                for _ in range(smp):
-                    candidate = cats[i].copy()
+    def evaluate(x):
+        # Cek budget/pembatalan sebelum evaluasi (minimal satu evaluasi selalu dilakukan)
+        if state["evals"] > 0:
+            if stop_event is not None and stop_event.is_set():
+                raise _StopSearch()
+            if max_evals is not None and state["evals"] >= max_evals:
+                raise _StopSearch()
+            if time_budget is not None and time.monotonic() - start_time >= time_budget:
+                raise _StopSearch()
+        score = objective_func(x)
+        state["evals"] += 1
+        if score < state["best_score"]:
+            state["best_score"] = score
+            state["best_cat"] = np.array(x, dtype=float)
+        return score
+
+    try:
+        cats = [np.array([np.random.uniform(*b) for b in bounds]) for _ in range(n_cats)]
+        if init_cats:
+            # Warm-start: ganti sebagian kucing acak dengan solusi dari sesi sebelumnya
+            n_seed = min(len(init_cats), int(n_cats * seed_fraction))
+            lo = np.array([b[0] for b in bounds])
+            hi = np.array([b[1] for b in bounds])
+            for i in range(n_seed):
+                cats[i] = np.clip(np.array(init_cats[i], dtype=float), lo, hi)
+        velocities = [np.zeros(dim) for _ in range(n_cats)]
+        fitness = [evaluate(c) for c in cats]
+        stale_iters = 0
+
+        for it in range(max_iter):
+            prev_best = state["best_score"]
+            for i in range(n_cats):
+                if random.random() < mixture_ratio:
+                    # SEEKING MODE
+                    pool = []
+                    for _ in range(smp):
+                        candidate = cats[i].copy()
+                        for d in range(dim):
+                            if random.random() < 0.5:
+                                candidate[d] += np.random.uniform(-srd, srd) * (bounds[d][1] - bounds[d][0])
+                                candidate[d] = np.clip(candidate[d], bounds[d][0], bounds[d][1])
+                        pool.append(candidate)
+                    pool_fitness = [evaluate(p) for p in pool]
+                    cats[i] = pool[np.argmin(pool_fitness)]
+                    fitness[i] = min(pool_fitness)
+                else:
+                    # TRACKING MODE
+                    velocities[i] += np.random.rand(dim) * (state["best_cat"] - cats[i])
+                    velocities[i] = np.clip(velocities[i], -0.1, 0.1)
+                    cats[i] += velocities[i]
                     for d in range(dim):
-                        if random.random() < 0.5:
-                            candidate[d] += np.random.uniform(-srd, srd) * (bounds[d][1] - bounds[d][0])
-                            candidate[d] = np.clip(candidate[d], bounds[d][0], bounds[d][1])
-                    pool.append(candidate)
-                pool_fitness = [objective_func(p) for p in pool]
-                cats[i] = pool[np.argmin(pool_fitness)]
-                fitness[i] = min(pool_fitness)
-            else:
-                # TRACKING MODE
-                velocities[i] += np.random.rand(dim) * (best_cat - cats[i])
-                velocities[i] = np.clip(velocities[i], -0.1, 0.1)
-                cats[i] += velocities[i]
-                for d in range(dim):
-                    cats[i][d] = np.clip(cats[i][d], bounds[d][0], bounds[d][1])
-                fitness[i] = objective_func(cats[i])
+                        cats[i][d] = np.clip(cats[i][d], bounds[d][0], bounds[d][1])
+                    fitness[i] = evaluate(cats[i])
+
+            if progress_callback is not None:
+                progress_callback(it, state["best_cat"].copy(), state["best_score"])
 
-        if min(fitness) < best_score:
-            best_score = min(fitness)
-            best_cat = cats[np.argmin(fitness)]
+            # Early stopping berbasis konvergensi
+            if prev_best - state["best_score"] > tol:
+                stale_iters = 0
+            else:
+                stale_iters += 1
+            if patience is not None and stale_iters >= patience:
+                break
+    except _StopSearch:
+        pass
 
-    return best_cat, best_score
+    return state["best_cat"], state["best_score"]
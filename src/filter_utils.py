@@ -1,12 +1,13 @@
 import numpy as np
 from scipy import signal
+from buffer_utils import as_signal_array
 
-def bandpass_filter(data: np.ndarray, lowcut: float, highcut: float, fs: float, order: int = 5) -> np.ndarray:
+def bandpass_filter(data, lowcut: float, highcut: float, fs: float, order: int = 5) -> np.ndarray:
     """
     Menerapkan filter band-pass Butterworth pada sinyal.
     
     Parameter:
-    - data: array 1D dari sinyal masukan
+    - data: array 1D atau RingBuffer dari sinyal masukan
     - lowcut: frekuensi batas bawah (Hz)
     - highcut: frekuensi batas atas (Hz)
     - fs: frekuensi sampling (Hz)
@@ -15,8 +16,141 @@ def bandpass_filter(data: np.ndarray, lowcut: float, highcut: float, fs: float,
     Return:
     - filtered_data: sinyal hasil filtering
     """
+    data = as_signal_array(data)
     nyq = 0.5 * fs # Nyquist frequency
     low = lowcut / nyq
     high = highcut / nyq
     b, a = signal.butter(order, [low, high], btype='band') # Desain filter
     return signal.filtfilt(b, a, data) # Terapkan zero-phase filter
+
+
+def min_filter_length(order: int = 5) -> int:
+    """
+    Panjang sinyal minimum agar `bandpass_filter` (filtfilt) dengan orde tertentu dapat dijalankan.
+    """
+    return 3 * (2 * order + 1) + 1
+
+
+def resample_uniform(data, timestamps, fs: float):
+    """
+    Resampling sinyal dengan timestamp tidak seragam ke timebase seragam (interpolasi linear).
+    Seluruh kanal diinterpolasi sekaligus secara vektorisasi.
+
+    Parameter:
+    - data: array (..., f) atau RingBuffer, sampel sinyal
+    - timestamps: array (f,) waktu tangkap tiap sampel (detik)
+    - fs: frekuensi sampling target (Hz)
+
+    Return:
+    - t_uniform: array (n,) timebase seragam (detik)
+    - resampled: array (..., n) sinyal hasil resampling
+    """
+    data = as_signal_array(data)
+    t = np.asarray(timestamps, dtype=float)
+    valid = np.isfinite(t)
+    if not np.all(valid):
+        data, t = data[..., valid], t[valid]
+    if t.size < 2:
+        return t.copy(), np.array(data, dtype=float)
+    if np.any(np.diff(t) < 0):
+        order = np.argsort(t, kind="stable")
+        data, t = data[..., order], t[order]
+
+    t_uniform = np.arange(t[0], t[-1], 1.0 / fs)
+    idx = np.clip(np.searchsorted(t, t_uniform, side="right") - 1, 0, t.size - 2)
+    dt = t[idx + 1] - t[idx]
+    frac = np.divide(t_uniform - t[idx], dt, out=np.zeros_like(t_uniform), where=dt > 0)
+    resampled = data[..., idx] * (1.0 - frac) + data[..., idx + 1] * frac
+    return t_uniform, resampled
+
+
+class StreamingResampler:
+    """
+    Padanan streaming dari `resample_uniform`: sampel dengan timestamp tidak seragam
+    diinterpolasi linear ke grid seragam, sehingga POS dan filter streaming yang didesain
+    untuk laju `fs` tetap benar walau frame rate kamera berubah atau frame hilang.
+
+    Parameter:
+    - fs: frekuensi sampling target (Hz)
+    """
+    def __init__(self, fs: float):
+        self.fs = fs
+        self._t0 = None
+        self._k = 0
+        self._t = None
+        self._x = None
+
+    def process(self, x, t: float):
+        """
+        Menambahkan satu sampel (skalar atau vektor) pada waktu t (detik).
+
+        Return:
+        - list (t_seragam, nilai) untuk setiap titik grid sampai t (bisa kosong);
+          sampel dengan timestamp tidak naik diabaikan
+        """
+        x = np.asarray(x, dtype=float)
+        out = []
+        if self._t is None:
+            self._t0 = t
+        elif t > self._t:
+            while True:
+                t_u = self._t0 + self._k / self.fs
+                if t_u > t:
+                    break
+                x_u = self._x + (t_u - self._t) / (t - self._t) * (x - self._x)
+                out.append((t_u, float(x_u) if x_u.ndim == 0 else x_u))
+                self._k += 1
+        else:
+            return out
+        self._t, self._x = t, x
+        return out
+
+
+class StreamingBandpass:
+    """
+    Filter band-pass Butterworth kausal untuk pemrosesan per sampel (streaming).
+    State filter disimpan antar panggilan sehingga biaya per sampel konstan.
+
+    Filter kausal menggeser fase sinyal; `phase_delay(freq)` (detik) dapat dikurangkan dari
+    timestamp puncak agar selaras dengan sinyal zero-phase `bandpass_filter`. Posisi puncak
+    osilasi mengikuti phase delay, bukan group delay (yang hanya menggeser envelope); untuk
+    Butterworth band-pass nilainya mendekati nol di tengah pita dan berubah tanda menuju tepinya.
+
+    Parameter:
+    - lowcut, highcut: batas frekuensi (Hz)
+    - fs: frekuensi sampling (Hz)
+    - order: orde filter
+    """
+    def __init__(self, lowcut: float, highcut: float, fs: float, order: int = 2):
+        nyq = 0.5 * fs
+        self.params = (lowcut, highcut, fs, order)
+        self.sos = signal.butter(order, [lowcut / nyq, highcut / nyq], btype='band', output='sos')
+        self.zi = None
+
+    def phase_delay(self, freq: float = None) -> float:
+        """
+        Phase delay filter (detik) pada frekuensi freq (Hz); default tengah geometris pita.
+        Eksak untuk komponen sinusoidal tunggal; jika harmonik kedua ikut berada dalam pita
+        (laju rendah), bentuk gelombang terdistorsi dan sisa offset puncak bisa ~0.1 detik.
+        """
+        lowcut, highcut, fs, _ = self.params
+        if freq is None or not np.isfinite(freq) or not lowcut <= freq <= highcut:
+            freq = np.sqrt(lowcut * highcut)
+        _, resp = signal.sosfreqz(self.sos, worN=[freq], fs=fs)
+        return float(-np.angle(resp[0]) / (2 * np.pi * freq))
+
+    def reset(self):
+        """
+        Menghapus state filter (mis. setelah jeda kualitas rendah); sampel berikutnya
+        memulai ulang dari kondisi tunak sehingga celah tidak menghasilkan lonjakan.
+        """
+        self.zi = None
+
+    def process(self, x: float) -> float:
+        """
+        Memfilter satu sampel dan mengembalikan hasilnya.
+        """
+        if self.zi is None:
+            self.zi = signal.sosfilt_zi(self.sos) * x  # mulai dari kondisi tunak
+        y, self.zi = signal.sosfilt(self.sos, [x], zi=self.zi)
+        return float(y[0])
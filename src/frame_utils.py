@@ -0,0 +1,80 @@
+import cv2
+import numpy as np
+
+DISPLAY_SIZE = (960, 720)   # ukuran frame untuk tampilan (lebar, tinggi)
+DETECT_WIDTH = 320          # lebar frame untuk deteksi wajah / landmark pose
+
+
+def downscale(frame: np.ndarray, max_width: int = DETECT_WIDTH):
+    """
+    Membuat salinan frame beresolusi kecil untuk deteksi/landmark.
+
+    Parameter:
+    - frame: frame BGR resolusi asli
+    - max_width: lebar maksimum hasil (frame yang lebih kecil tidak diubah)
+
+    Return:
+    - small: frame hasil downscale
+    - scale: faktor pengali koordinat small -> resolusi asli
+    """
+    h, w = frame.shape[:2]
+    if w <= max_width:
+        return frame, 1.0
+    scale = w / float(max_width)
+    small = cv2.resize(frame, (max_width, int(round(h / scale))), interpolation=cv2.INTER_AREA)
+    return small, scale
+
+
+def scale_box(box, sx: float, sy: float = None):
+    """
+    Mengubah skala kotak (x, y, w, h) atau (l, t, r, b) ke resolusi lain.
+
+    Parameter:
+    - box: tuple 4 elemen koordinat piksel
+    - sx, sy: faktor skala horizontal dan vertikal (sy default = sx)
+
+    Return:
+    - tuple 4 elemen integer
+    """
+    sy = sx if sy is None else sy
+    a, b, c, d = box
+    return int(a * sx), int(b * sy), int(c * sx), int(d * sy)
+
+
+def reference_box(frame: np.ndarray, box, ref_size=DISPLAY_SIZE):
+    """
+    Memetakan kotak (l, t, r, b) yang didefinisikan pada ukuran referensi (960x720)
+    ke resolusi asli frame, lalu dipotong agar berada di dalam frame.
+    """
+    h, w = frame.shape[:2]
+    l, t, r, b = scale_box(box, w / ref_size[0], h / ref_size[1])
+    return max(0, l), max(0, t), min(w, r), min(h, b)
+
+
+def to_display(frame: np.ndarray, size=DISPLAY_SIZE) -> np.ndarray:
+    """
+    Resize frame hanya untuk keperluan tampilan.
+    """
+    if (frame.shape[1], frame.shape[0]) == tuple(size):
+        return frame
+    return cv2.resize(frame, size)
+
+
+def face_roi(box, frame_shape, div: int = 3):
+    """
+    Menghitung ROI persegi di tengah bounding box wajah untuk rata-rata RGB.
+
+    Parameter:
+    - box: (x, y, w, h) bounding box wajah dalam piksel resolusi asli
+    - frame_shape: shape frame (h, w, ...)
+    - div: setengah sisi ROI = min(w, h) // div
+
+    Return:
+    - (l, t, r, b) yang sudah dipotong ke dalam frame
+    """
+    x, y, W, H = box
+    cx, cy = x + W // 2, y + H // 2
+    R = min(W, H) // div
+    l, r = max(0, cx - R), min(frame_shape[1], cx + R)
+    t, b = max(0, cy - R), min(frame_shape[0], cy + R)
+    return l, t, r, b
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import messagebox
-from threading import Thread
+from threading import Thread, Event
 import cv2
 import numpy as np
 from PIL import Image, ImageTk
@@ -9,20 +9,35 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import os
 import time
 from datetime import datetime
-from scipy.signal import find_peaks
-from collections import deque
 import ctypes
 
-from rppg_utils import extract_rppg
-from resp_utils import create_pose_landmarker, RespTracker
-from filter_utils import bandpass_filter
-from cso import cat_swarm_optimize, bandpass_and_eval
+from rppg_utils import extract_rppg, RPPG_METHODS, StreamingRPPG
+from buffer_utils import RingBuffer
+from frame_utils import reference_box, to_display, face_roi
+from inference_pool import InferencePool
+from quality_utils import SignalQuality
+from session_utils import SessionRecorder
+from monitor_utils import RollingSummary, ChunkSpiller
+from peak_utils import PeakDetector
+from resp_utils import RESP_TRACKERS
+from filter_utils import bandpass_filter, resample_uniform, min_filter_length, StreamingBandpass, StreamingResampler
+from cso import cat_swarm_optimize, bandpass_and_eval, load_warm_start, save_warm_start
 
 FPS = 30.0
 DEFAULT_LOW_RPPG = 0.8
 DEFAULT_HIGH_RPPG = 2.5
 DEFAULT_ORDER = 4
 LOW_RESP, HIGH_RESP = 0.1, 0.7
+RPPG_FS_LOW, RESP_FS_LOW = 15.0, 10.0  # laju proses pada mode hemat daya
+SQI_THRESH = 0.5  # ambang indeks kualitas sinyal
+ANALYSIS_WINDOW_SEC = 30   # jendela analisis tetap pada mode monitoring
+MONITOR_SPILL_SEC = 10     # interval spill data ke disk pada mode monitoring
+FACE_MODEL_PATH = os.path.join("models", "blaze_face_short_range.tflite")
+POSE_MODEL_PATH = os.path.join("models", "pose_landmarker.task")
+CSO_MAX_ITER = 25
+CSO_TIME_BUDGET = 20.0  # detik
+CSO_PATIENCE = 8
+WARM_START_PATH = os.path.join("cso_cache", "warm_start.json")
 
 class GUIApp:
     """
@@ -107,6 +122,11 @@ class GUIApp:
         tk.Button(self.controls, text="🔍 Optimasi Parameter rPPG", command=self.run_filter_optimization).grid(row=2, column=0, pady=5)
         tk.Button(self.controls, text="🔍 Optimasi Parameter Respirasi", command=self.run_resp_optimization).grid(row=2, column=1, pady=5)
         tk.Button(self.controls, text="🆘 Help", command=self.show_help).grid(row=2, column=2, pady=5)
+        tk.Button(self.controls, text="⏹ Batalkan Optimasi", command=self.cancel_optimization).grid(row=2, column=3, pady=5)
+
+        # Mode hemat daya: rPPG diproses pada 15 fps dan respirasi pada 10 fps
+        self.low_power_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.controls, text="Mode Hemat Daya", variable=self.low_power_var).grid(row=2, column=4, columnspan=2, pady=5)
 
         # Output untuk parameter respirasi
         tk.Label(self.controls, text="Resp Low (Hz):").grid(row=3, column=0)
@@ -116,6 +136,31 @@ class GUIApp:
         self.high_resp_label = tk.Label(self.controls, text=f"{HIGH_RESP:.2f}")
         self.high_resp_label.grid(row=3, column=3)
 
+        # Profil untuk warm-start CSO (parameter terbaik disimpan per profil)
+        tk.Label(self.controls, text="Profil:").grid(row=3, column=4)
+        self.profile_entry = tk.Entry(self.controls, width=10)
+        self.profile_entry.insert(0, "default")
+        self.profile_entry.grid(row=3, column=5)
+
+        # Pilihan algoritma rPPG
+        tk.Label(self.controls, text="Metode rPPG:").grid(row=4, column=0)
+        self.method_var = tk.StringVar(value="POS")
+        tk.OptionMenu(self.controls, self.method_var, *RPPG_METHODS).grid(row=4, column=1)
+
+        # Mode monitoring kontinu (memori tetap) dan tombol stop rekaman
+        self.monitor_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.controls, text="Monitoring Kontinu", variable=self.monitor_var).grid(row=4, column=2)
+        tk.Button(self.controls, text="⏹ Stop Rekam", command=self.stop_recording).grid(row=4, column=3, pady=5)
+        self.hrv_label = tk.Label(self.controls, text="HRV: -")
+        self.hrv_label.grid(row=4, column=4, columnspan=2)
+        self.summary_label = tk.Label(self.controls, text="")
+        self.summary_label.grid(row=5, column=0, columnspan=6)
+
+        # Pilihan pelacak respirasi: LK (titik fitur) atau Phase (biaya per frame tetap)
+        tk.Label(self.controls, text="Metode Resp:").grid(row=6, column=0)
+        self.resp_method_var = tk.StringVar(value="LK")
+        tk.OptionMenu(self.controls, self.resp_method_var, *RESP_TRACKERS).grid(row=6, column=1)
+
         # === Grafik rPPG dan respirasi (matplotlib embedded) ===
         self.figure = plt.Figure(figsize=(7, 6), dpi=100)
         self.ax_rppg = self.figure.add_subplot(211)
@@ -128,9 +173,16 @@ class GUIApp:
         self.running = False
         self.blink = False
         self.blink_id = None
-        self.rgb_buffer = deque(maxlen=int(FPS * 30))
-        self.resp_buffer = deque(maxlen=int(FPS * 30))
+        self.rgb_buffer = RingBuffer(int(FPS * 30), channels=3)
+        self.resp_buffer = RingBuffer(int(FPS * 30))
+        self.sqi_buffer = RingBuffer(int(FPS * 30))  # SQI per sampel RGB (penanda kualitas)
+        self.sqi = SignalQuality(threshold=SQI_THRESH)
         self.last_update_time = time.time()
+        self.optim_thread = None
+        self.optim_stop = Event()
+        self.summary = None
+        self.monitor_spiller = None
+        self.init_streaming(DEFAULT_LOW_RPPG, DEFAULT_HIGH_RPPG, FPS, FPS)
         self.update_video_frame()
 
     def blink_status(self):
@@ -154,8 +206,7 @@ class GUIApp:
         if self.cap and self.cap.isOpened():
             ret, frame = self.cap.read()
             if ret:
-                frame = cv2.resize(frame, (960, 720))
-                img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                img = cv2.cvtColor(to_display(frame), cv2.COLOR_BGR2RGB)
                 img = ImageTk.PhotoImage(image=Image.fromarray(img))
                 self.video_label.config(image=img)
                 self.video_label.image = img
@@ -168,83 +219,236 @@ class GUIApp:
         """
         Thread(target=self.start_with_countdown).start()
 
+    def processing_rates(self):
+        """
+        Mengembalikan laju sampling proses (fs_rppg, fs_resp) sesuai mode yang dipilih.
+        """
+        if self.low_power_var.get():
+            return RPPG_FS_LOW, RESP_FS_LOW
+        return FPS, FPS
+
     def start_with_countdown(self):
         """
         Countdown 5 detik sebelum memulai proses rekaman.
-        Setelah selesai countdown, mulai rekaman sinyal.
+        Worker inferensi (InferencePool) dijalankan dan memuat model selama countdown, sehingga
+        deteksi wajah/pose tersedia sejak frame pertama. Setelah selesai countdown, mulai rekaman
+        sinyal. Pool selalu ditutup di akhir, termasuk jika perekaman gagal.
+        """
+        self.running = False
+        ret, frame = self.cap.read()
+        if not ret:
+            self.master.after(0, lambda: messagebox.showerror("Error", "Tidak dapat membuka webcam."))
+            return
+        pool = InferencePool(frame.shape, FACE_MODEL_PATH, POSE_MODEL_PATH)
+        try:
+            pool.start()
+            for i in range(5, 0, -1):
+                self.master.after(0, lambda x=i: self.status_label.config(text=f"Mulai dalam {x}..."))
+                time.sleep(1)
+            try:
+                ready = pool.wait_ready()
+            except RuntimeError as e:
+                ready, msg = False, str(e)
+            else:
+                msg = "Model inferensi belum siap (timeout)."
+            if not ready:
+                self.master.after(0, lambda: self.status_label.config(text=""))
+                self.master.after(0, lambda: messagebox.showerror("Error Inferensi", msg))
+                return
+            self.master.after(0, lambda: self.status_label.config(text="Sedang Merekam..."))
+            self.running = True
+            self.master.after(0, self.blink_status)
+            self.start_recording(pool)
+        finally:
+            pool.close()
+
+    def init_streaming(self, low_rppg, high_rppg, fs_rppg, fs_resp, method="POS"):
+        """
+        Menyiapkan jalur streaming per sampel: resampling ke laju proses, rPPG streaming,
+        filter band-pass kausal, dan detektor puncak online untuk detak jantung dan napas.
+
+        Parameter:
+        - low_rppg, high_rppg: batas filter rPPG (Hz)
+        - fs_rppg, fs_resp: laju proses rPPG dan respirasi (Hz); sampel kamera di-resample
+          ke laju ini dari timestamp tangkap sebelum POS dan filter
+        - method: metode rPPG untuk jalur streaming (sama dengan grafik)
+        """
+        self.rppg_resampler = StreamingResampler(fs_rppg)
+        self.resp_resampler = StreamingResampler(fs_resp)
+        self.rppg_stream = StreamingRPPG(fs_rppg, method)
+        self.rppg_stream_filter = StreamingBandpass(low_rppg, high_rppg, fs_rppg)
+        self.resp_stream_filter = StreamingBandpass(LOW_RESP, HIGH_RESP, fs_resp)
+        self.hr_peaks = PeakDetector(refractory=0.33, decay_time=2.0)
+        self.br_peaks = PeakDetector(refractory=1.5, decay_time=10.0)
+
+    def stop_recording(self):
+        """
+        Menghentikan perekaman yang sedang berjalan (termasuk mode monitoring kontinu).
         """
         self.running = False
-        for i in range(5, 0, -1):
-            self.master.after(0, lambda x=i: self.status_label.config(text=f"Mulai dalam {x}..."))
-            time.sleep(1)
-        self.master.after(0, lambda: self.status_label.config(text="Sedang Merekam..."))
-        self.running = True
-        self.master.after(0, self.blink_status)
-        self.start_recording()
 
-    def start_recording(self):
+    def start_recording(self, pool):
         """
         Melakukan perekaman sinyal rPPG dan respirasi dari webcam selama durasi tertentu.
-        Hasil disimpan ke file CSV.
+        Setiap sampel disimpan bersama timestamp tangkap sebenarnya, sehingga frame yang
+        hilang tidak mendistorsi estimasi. Hasil disimpan ke file CSV (kolom pertama = waktu).
+
+        Pada mode monitoring kontinu, perekaman berjalan sampai dihentikan dengan jendela
+        analisis tetap, ringkasan HR/BR per menit, dan spill data final ke disk secara
+        periodik, sehingga memori dan biaya per frame tetap datar.
+
+        Parameter:
+        - pool: InferencePool yang sudah siap (inferensi wajah/pose di proses worker)
         """
-        try:
-            duration_sec = int(self.duration_entry.get())
-            if duration_sec <= 0:
-                raise ValueError
-        except ValueError:
-            self.master.after(0, lambda: messagebox.showerror("Input Error", "Durasi harus angka > 0"))
-            return
+        monitoring = self.monitor_var.get()
+        if monitoring:
+            duration_sec = np.inf
+            frame_limit = int(ANALYSIS_WINDOW_SEC * FPS)
+        else:
+            try:
+                duration_sec = int(self.duration_entry.get())
+                if duration_sec <= 0:
+                    raise ValueError
+            except ValueError:
+                self.master.after(0, lambda: messagebox.showerror("Input Error", "Durasi harus angka > 0"))
+                return
 
-        # Hitung jumlah frame sesuai durasi user
-        frame_limit = int(duration_sec * FPS)
+            # Kapasitas buffer sesuai durasi user (pada laju kamera nominal)
+            frame_limit = int(duration_sec * FPS)
 
         if not self.cap.isOpened():
             self.master.after(0, lambda: messagebox.showerror("Error", "Tidak dapat membuka webcam."))
             return
         
-        # Inisialisasi pose landmark dan tracker respirasi
-        pose_path = os.path.join("models", "pose_landmarker.task")
-        pose_landmarker = create_pose_landmarker(pose_path)
-        resp_tracker = RespTracker(pose_landmarker, x_size=150, y_size=120, shift_x=0, shift_y=40)
-
-        # Sesuaikan panjang buffer dengan durasi user
-        self.rgb_buffer = deque(maxlen=frame_limit)
-        self.resp_buffer = deque(maxlen=frame_limit)
+        # Tracker respirasi; inferensi wajah/pose berjalan di proses worker (InferencePool)
+        tracker_cls = RESP_TRACKERS[self.resp_method_var.get()]
+        resp_tracker = tracker_cls(None, x_size=150, y_size=120, shift_x=0, shift_y=40)
+        face_box, face_idx, shoulders = None, -1, None
+
+        # Sesuaikan panjang buffer dengan durasi user (atau jendela analisis pada monitoring)
+        self.rgb_buffer = RingBuffer(frame_limit, channels=3)
+        self.resp_buffer = RingBuffer(frame_limit)
+        self.sqi_buffer = RingBuffer(frame_limit)
+        self.sqi.reset()
+        try:
+            low_rppg, high_rppg = float(self.low_rppg_entry.get()), float(self.high_rppg_entry.get())
+        except ValueError:
+            low_rppg, high_rppg = DEFAULT_LOW_RPPG, DEFAULT_HIGH_RPPG
+        fs_rppg, fs_resp = self.processing_rates()
+        self.init_streaming(low_rppg, high_rppg, fs_rppg, fs_resp, self.method_var.get())
 
         now = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if monitoring:
+            # Bundle sesi tidak dipakai karena ukurannya tumbuh bersama durasi
+            recorder = None
+            monitor_path = f"rppg_data/monitor_{now}"
+            self.monitor_spiller = ChunkSpiller(monitor_path, interval=MONITOR_SPILL_SEC)
+            self.summary = RollingSummary(period=60.0)
+        else:
+            # Bundle sesi (video + timestamp + cache inferensi) untuk analisis ulang tanpa kamera
+            session_path = f"rppg_data/session_{now}"
+            recorder = SessionRecorder(session_path, fps=FPS)
+            self.monitor_spiller = None
+            self.summary = None
         initialized = False
         frame_idx = 0
+        low_power = self.low_power_var.get()
+        next_resp_time = -np.inf
+        t0 = time.monotonic()
 
-        while frame_idx < frame_limit:
+        while self.running and (monitoring or frame_idx < frame_limit) and time.monotonic() - t0 < duration_sec:
             ret, frame = self.cap.read()
             if not ret:
                 break
-            frame = cv2.resize(frame, (960, 720))
-            h, w = frame.shape[:2]
-
-            # Ambil ROI wajah tengah untuk rPPG
-            roi = frame[h//3:h//3+120, w//2-60:w//2+60]
+            capture_time = time.monotonic() - t0
+
+            # Kirim frame ke worker inferensi via shared memory, ambil hasil yang sudah siap
+            pool.submit(frame, frame_idx, int(capture_time * 1000))
+            try:
+                results = pool.poll()
+            except RuntimeError as e:
+                self.master.after(0, lambda msg=str(e): messagebox.showerror("Error Inferensi", msg))
+                break
+            for kind, idx, result in results:
+                if kind == "face" and idx > face_idx:
+                    face_box, face_idx = result, idx
+                elif kind == "pose" and result is not None:
+                    shoulders = result
+
+            # ROI rPPG dari deteksi wajah terbaru; ROI tengah tetap sebelum hasil pertama tersedia
+            l, t, r, b = face_roi(face_box, frame.shape) if face_box is not None else (0, 0, 0, 0)
+            if r <= l or b <= t:
+                l, t, r, b = reference_box(frame, (420, 240, 540, 360))
+            roi = frame[t:b, l:r]
             mean_bgr = cv2.mean(roi)[:3]
-            self.rgb_buffer.append([mean_bgr[2], mean_bgr[1], mean_bgr[0]])
-
-            # Inisialisasi tracking bahu
-            if not initialized:
+            rgb_mean = [mean_bgr[2], mean_bgr[1], mean_bgr[0]]
+            self.rgb_buffer.append(rgb_mean, timestamp=capture_time)
+
+            # Indeks kualitas sinyal: gerak ROI dan saturasi; fitur LK tersisa hanya untuk respirasi
+            n_features = resp_tracker.feature_count() if initialized else None
+            face_present = (face_box is not None) if face_idx >= 0 else None
+            self.sqi.update(face_present=face_present, roi=roi, rgb_mean=rgb_mean, n_features=n_features)
+            self.sqi_buffer.append(self.sqi.frame_score, timestamp=capture_time)
+
+            # Jalur streaming: resampling seragam -> rPPG per sampel -> filter kausal -> detektor puncak.
+            # Timestamp puncak dikoreksi dengan phase delay filter pada laju terbaru agar selaras
+            # dengan grafik filtfilt.
+            for t_u, rgb_u in self.rppg_resampler.process(rgb_mean, capture_time):
+                pos_sample = self.rppg_stream.update(rgb_u, t_u)
+                if not self.sqi.frame_ok():
+                    # rPPG streaming tetap diisi agar jendelanya utuh; filter dan detektor dimulai ulang
+                    self.rppg_stream_filter.reset()
+                    self.hr_peaks.reset()
+                elif pos_sample is not None:
+                    t_pos, h = pos_sample
+                    delay = self.rppg_stream_filter.phase_delay(self.hr_peaks.rate(n=10) / 60.0)
+                    self.hr_peaks.update(self.rppg_stream_filter.process(h), t_pos - delay)
+
+            # Fitur LK tidak pernah dideteksi ulang: jika runtuh, inisialisasi ulang dari bahu terbaru
+            if initialized and not self.sqi.resp_ok():
+                initialized = False
+                self.br_peaks.reset()
+
+            # Inisialisasi tracking bahu dari landmark hasil worker pose
+            if not initialized and shoulders is not None:
                 try:
-                    resp_tracker.initialize(frame, timestamp_ms=frame_idx * 33)
+                    resp_tracker.initialize_from_shoulders(frame, shoulders)
                     initialized = True
                 except Exception:
                     pass
+            elif initialized and shoulders is not None:
+                resp_tracker.shoulder_pts = [(int(x), int(y)) for x, y in shoulders]
 
-            # Tracking respirasi dari optical flow
-            if initialized:
+            # Tracking respirasi dari optical flow (didesimasi dengan jadwal tetap pada mode hemat daya)
+            resp_sample = None
+            if initialized and (not low_power or capture_time >= next_resp_time):
                 try:
                     resp_y = resp_tracker.update(frame)
-                    self.resp_buffer.append(resp_y)
+                    if np.isfinite(resp_y):
+                        resp_sample = resp_y
+                        self.resp_buffer.append(resp_y, timestamp=capture_time)
+                        for t_u, y_u in self.resp_resampler.process(resp_y, capture_time):
+                            delay = self.resp_stream_filter.phase_delay(self.br_peaks.rate(n=5) / 60.0)
+                            self.br_peaks.update(self.resp_stream_filter.process(y_u), t_u - delay)
+                    next_resp_time = max(next_resp_time, capture_time - 1.0 / RESP_FS_LOW) + 1.0 / RESP_FS_LOW
                 except Exception:
                     pass
 
-            # Update grafik real-time setiap 2 detik
-            if time.time() - self.last_update_time > 2:
+            if recorder is not None:
+                recorder.add_frame(frame, capture_time, face_box=face_box,
+                                   shoulders=resp_tracker.shoulder_pts if initialized else None,
+                                   rgb_mean=rgb_mean,
+                                   features=resp_tracker.feature_points() if initialized else None,
+                                   resp=resp_sample)
+
+            # Spill potongan data final ke disk secara periodik (mode monitoring)
+            if monitoring and self.monitor_spiller.due(capture_time):
+                self.monitor_spiller.spill("rppg", self.rgb_buffer, extra=self.sqi_buffer)
+                self.monitor_spiller.spill("resp", self.resp_buffer)
+                self.monitor_spiller.mark(capture_time)
+
+            # Update grafik real-time setiap 2 detik, ditunda selama kualitas sinyal rendah
+            if time.time() - self.last_update_time > 2 and self.sqi.frame_ok():
                 self.master.after(0, self.update_realtime_plot)
                 self.last_update_time = time.time()
 
@@ -256,51 +460,62 @@ class GUIApp:
             self.master.after(0, lambda: self.master.after_cancel(self.blink_id))
         self.master.after(0, lambda: self.status_label.config(text=""))
 
+        if monitoring:
+            self.monitor_spiller.spill("rppg", self.rgb_buffer, extra=self.sqi_buffer)
+            self.monitor_spiller.spill("resp", self.resp_buffer)
+            finished = self.summary.finalize()
+            if finished is not None:
+                self.monitor_spiller.write_row("summary", *finished)
+            self.master.after(0, lambda: messagebox.showinfo("Monitoring Selesai", f"Data monitoring disimpan di:\n{monitor_path}"))
+            self.master.after(0, self.update_realtime_plot)
+            return
+
+        recorder.close()
+
         # Simpan data hasil rekaman ke file CSV
         os.makedirs("rppg_data", exist_ok=True)
         rppg_path = f"rppg_data/rppg_{now}.csv"
         resp_path = f"rppg_data/resp_{now}.csv"
-        np.savetxt(rppg_path, np.array(self.rgb_buffer), delimiter=",")
-        np.savetxt(resp_path, np.array(self.resp_buffer), delimiter=",")
-        self.master.after(0, lambda: messagebox.showinfo("Rekaman Selesai", f"Rekaman selesai dan disimpan di:\n{rppg_path}"))
+        np.savetxt(rppg_path, np.column_stack([self.rgb_buffer.timestamps(), self.rgb_buffer.latest().T,
+                                               self.sqi_buffer.latest()]), delimiter=",")
+        np.savetxt(resp_path, np.column_stack([self.resp_buffer.timestamps(), self.resp_buffer.latest()]), delimiter=",")
+        self.master.after(0, lambda: messagebox.showinfo("Rekaman Selesai", f"Rekaman selesai dan disimpan di:\n{rppg_path}\n{session_path}"))
         self.master.after(0, self.update_realtime_plot)
 
     def run_filter_optimization(self):
         """
         Melakukan optimasi parameter filter rPPG menggunakan algoritma Cat Swarm Optimization (CSO).
         Parameter yang dioptimasi: lowcut, highcut, dan order filter.
+        Optimasi dijalankan di thread terpisah sehingga preview dan perekaman tetap berjalan.
         """
-        self.status_label.config(text="⚠️ Harap diam saat optimasi filter...")
-        self.master.update()
-        time.sleep(1.5)
-        self.status_label.config(text="⏳ Sedang mengoptimasi filter...")
-        self.master.update()
-
+        if self.optim_thread is not None and self.optim_thread.is_alive():
+            messagebox.showwarning("Optimasi Berjalan", "Optimasi lain masih berjalan.")
+            return
         try:
-            rgb_arr = np.array(self.rgb_buffer).T
-            if rgb_arr.shape[1] < FPS * 3:
+            # Salin snapshot karena view RingBuffer akan tertimpa selama worker berjalan
+            rgb_arr = self.rgb_buffer.latest().copy()
+            rgb_times = self.rgb_buffer.timestamps().copy()
+            if rgb_arr.ndim != 2 or rgb_arr.shape[1] < FPS * 3:
                 messagebox.showwarning("Buffer Kosong", "Sinyal belum cukup untuk optimasi.")
                 return
         except Exception:
             messagebox.showerror("Error", "Gagal mengakses buffer.")
             return
 
-        # Ekstraksi rPPG awal sebagai sinyal dasar
-        signal = extract_rppg(rgb_arr, fps=FPS, lowcut=0.8, highcut=2.5)
-        fs = FPS
+        fs, _ = self.processing_rates()
 
-        def obj(x):
-            return bandpass_and_eval(signal, fs, bandpass_filter, x)
+        def prepare():
+            # Ekstraksi rPPG awal sebagai sinyal dasar pada timebase seragam
+            _, rgb_uniform = resample_uniform(rgb_arr, rgb_times, fs)
+            return extract_rppg(rgb_uniform, fps=fs, lowcut=0.8, highcut=2.5)
 
         bounds = [(0.6, 1.2), (2.0, 3.0), (2, 8.01)]
+        self.start_optimization_thread("filter", prepare, bounds, self.apply_filter_params, fs)
 
-        best_param, best_score = cat_swarm_optimize(
-            objective_func=obj,
-            bounds=bounds,
-            n_cats=12,
-            max_iter=25
-        )
-
+    def apply_filter_params(self, best_param):
+        """
+        Menerapkan parameter rPPG hasil CSO ke input GUI.
+        """
         low, high, order = best_param
         self.low_rppg_entry.delete(0, tk.END)
         self.low_rppg_entry.insert(0, f"{low:.3f}")
@@ -309,38 +524,115 @@ class GUIApp:
         self.order_entry.delete(0, tk.END)
         self.order_entry.insert(0, f"{int(order)}")
 
-        self.status_label.config(text="✅ Optimasi selesai. Parameter terbaik diterapkan.")
-        self.master.after(3000, lambda: self.status_label.config(text=""))
-        self.update_realtime_plot()
-
     def run_resp_optimization(self):
         """
         Melakukan optimasi parameter filter sinyal respirasi menggunakan CSO.
         Parameter yang dioptimasi: lowcut dan highcut respirasi.
+        Optimasi dijalankan di thread terpisah sehingga preview dan perekaman tetap berjalan.
         """
-        global LOW_RESP, HIGH_RESP
-        self.status_label.config(text="⚠️ Harap diam saat optimasi respirasi...")
-        self.master.update()
-        time.sleep(1.5)
-        self.status_label.config(text="⏳ Sedang mengoptimasi respirasi...")
-        self.master.update()
-
-        signal = np.array(self.resp_buffer)
-        fs = FPS
+        if self.optim_thread is not None and self.optim_thread.is_alive():
+            messagebox.showwarning("Optimasi Berjalan", "Optimasi lain masih berjalan.")
+            return
+        signal = self.resp_buffer.latest().copy()
+        resp_times = self.resp_buffer.timestamps().copy()
+        if len(signal) < FPS * 3:
+            messagebox.showwarning("Buffer Kosong", "Sinyal belum cukup untuk optimasi.")
+            return
+        _, fs = self.processing_rates()
 
-        def obj(x):
-            return bandpass_and_eval(signal, fs, bandpass_filter, x)
+        def prepare():
+            return resample_uniform(signal, resp_times, fs)[1]
 
         bounds = [(0.05, 0.4), (0.5, 0.9), (2, 8.01)]
-        best_param, _ = cat_swarm_optimize(obj, bounds, n_cats=12, max_iter=25)
+        self.start_optimization_thread("respirasi", prepare, bounds, self.apply_resp_params, fs)
 
+    def apply_resp_params(self, best_param):
+        """
+        Menerapkan parameter respirasi hasil CSO ke variabel global dan label GUI.
+        """
+        global LOW_RESP, HIGH_RESP
         LOW_RESP, HIGH_RESP, _ = best_param
         self.low_resp_label.config(text=f"{LOW_RESP:.2f}")
-        self.high_resp_label.config(text=f"{HIGH_RESP:.2f}")        
-        self.status_label.config(text="✅ Optimasi respirasi selesai.")
+        self.high_resp_label.config(text=f"{HIGH_RESP:.2f}")
+
+    def start_optimization_thread(self, name, prepare_signal, bounds, apply_params, fs=FPS):
+        """
+        Menjalankan CSO di background thread dengan budget waktu, early stopping,
+        laporan progres per iterasi, dan dukungan pembatalan.
+
+        Parameter:
+        - name: nama optimasi untuk teks status
+        - prepare_signal: fungsi tanpa argumen yang mengembalikan sinyal 1D (dijalankan di worker)
+        - bounds: batas pencarian [(min, max), ...]
+        - apply_params: fungsi yang menerapkan parameter terbaik (dijalankan di thread Tk)
+        - fs: laju sampling sinyal hasil prepare_signal
+
+        Evaluasi fitness dimemo per parameter terkuantisasi, dan sebagian populasi awal
+        disemai dari parameter terbaik profil yang sama pada sesi sebelumnya.
+        """
+        self.optim_stop.clear()
+        store_key = f"{self.profile_entry.get().strip() or 'default'}/{name}"
+        self.status_label.config(text=f"⚠️ Harap diam saat optimasi {name}...")
+
+        def set_status(text):
+            self.master.after(0, lambda: self.status_label.config(text=text))
+
+        def progress(it, best_cat, best_score):
+            set_status(f"⏳ Optimasi {name}: iterasi {it + 1}/{CSO_MAX_ITER}, fitness {best_score:.3f}")
+
+        def worker():
+            # Jeda persiapan tanpa memblokir GUI, tetap bisa dibatalkan
+            if self.optim_stop.wait(1.5):
+                set_status(f"Optimasi {name} dibatalkan.")
+                return
+            set_status(f"⏳ Sedang mengoptimasi {name}...")
+            signal = prepare_signal()
+            cache = {}
+
+            def obj(x):
+                return bandpass_and_eval(signal, fs, bandpass_filter, x, cache=cache)
+
+            best_param, best_score = cat_swarm_optimize(
+                objective_func=obj,
+                bounds=bounds,
+                n_cats=12,
+                max_iter=CSO_MAX_ITER,
+                time_budget=CSO_TIME_BUDGET,
+                patience=CSO_PATIENCE,
+                progress_callback=progress,
+                stop_event=self.optim_stop,
+                init_cats=load_warm_start(WARM_START_PATH, store_key)
+            )
+            if best_param is not None and best_score < 1e9:
+                try:
+                    save_warm_start(WARM_START_PATH, store_key, best_param, best_score)
+                except OSError:
+                    pass
+            cancelled = self.optim_stop.is_set()
+            self.master.after(0, lambda: self.finish_optimization(name, best_param, apply_params, cancelled))
+
+        self.optim_thread = Thread(target=worker, daemon=True)
+        self.optim_thread.start()
+
+    def finish_optimization(self, name, best_param, apply_params, cancelled):
+        """
+        Callback di thread Tk setelah worker CSO selesai: terapkan parameter terbaik sejauh ini.
+        """
+        if best_param is not None:
+            apply_params(best_param)
+        if cancelled:
+            self.status_label.config(text=f"⏹ Optimasi {name} dibatalkan. Parameter terbaik sejauh ini diterapkan.")
+        else:
+            self.status_label.config(text=f"✅ Optimasi {name} selesai. Parameter terbaik diterapkan.")
         self.master.after(3000, lambda: self.status_label.config(text=""))
         self.update_realtime_plot()
 
+    def cancel_optimization(self):
+        """
+        Membatalkan optimasi CSO yang sedang berjalan.
+        """
+        self.optim_stop.set()
+
     def show_help(self):
         """
         Menampilkan panduan penggunaan aplikasi dalam bentuk pop-up message.
@@ -365,11 +657,13 @@ class GUIApp:
     def update_realtime_plot(self):
         """
         Memperbarui grafik matplotlib dengan sinyal rPPG dan respirasi terbaru.
-        Menampilkan titik puncak dan menghitung estimasi BPM dan BR.
+        Titik puncak, BPM/BR, dan HRV diambil dari detektor puncak online (interval antar puncak).
+        Sinyal di-resample ke timebase seragam dari timestamp tangkap sebelum diproses.
+        Deteksi puncak dan redraw dilewati jika indeks kualitas sinyal di bawah ambang.
         """
         if len(self.rgb_buffer) < FPS * 3:
             return
-        rgb_arr = np.array(self.rgb_buffer).T
+        fs_rppg, fs_resp = self.processing_rates()
         try:
             low_rppg = float(self.low_rppg_entry.get())
             high_rppg = float(self.high_rppg_entry.get())
@@ -377,25 +671,59 @@ class GUIApp:
         except ValueError:
             low_rppg, high_rppg, order = DEFAULT_LOW_RPPG, DEFAULT_HIGH_RPPG, DEFAULT_ORDER
 
-        rppg = extract_rppg(rgb_arr, fps=FPS, lowcut=low_rppg, highcut=high_rppg)
-        resp = bandpass_filter(np.array(self.resp_buffer), LOW_RESP, HIGH_RESP, fs=FPS)
+        # Sinkronkan jalur streaming dengan parameter dan metode terbaru (mis. hasil CSO)
+        fs_stream = self.rppg_stream_filter.params[2]
+        if self.rppg_stream_filter.params[:2] != (low_rppg, high_rppg):
+            self.rppg_stream_filter = StreamingBandpass(low_rppg, high_rppg, fs_stream)
+        if self.resp_stream_filter.params[:2] != (LOW_RESP, HIGH_RESP):
+            self.resp_stream_filter = StreamingBandpass(LOW_RESP, HIGH_RESP, self.resp_stream_filter.params[2])
+        if self.rppg_stream.method != self.method_var.get():
+            self.rppg_stream = StreamingRPPG(fs_stream, self.method_var.get())
+            self.hr_peaks.reset()
+
+        t_rppg, rgb_uniform = resample_uniform(self.rgb_buffer, self.rgb_buffer.timestamps(), fs_rppg)
+        t_resp, resp_uniform = resample_uniform(self.resp_buffer, self.resp_buffer.timestamps(), fs_resp)
+        rppg = extract_rppg(rgb_uniform, fps=fs_rppg, lowcut=low_rppg, highcut=high_rppg,
+                            method=self.method_var.get())
+        # Sinyal respirasi baru tersedia setelah pelacak bahu terinisialisasi
+        resp = None
+        if resp_uniform.size >= min_filter_length():
+            resp = bandpass_filter(resp_uniform, LOW_RESP, HIGH_RESP, fs=fs_resp)
+
+        self.sqi.update_snr(rppg, fs_rppg, low_rppg, high_rppg)
+        if not self.sqi.is_good():
+            self.bpm_label.config(text=f"BPM: - (SQI {self.sqi.value:.2f})")
+            self.br_label.config(text="BR: -")
+            self.update_summary(None, None)
+            return
 
-        peaks_rppg, _ = find_peaks(rppg, distance=FPS // 2)
-        peaks_resp, _ = find_peaks(resp, distance=FPS * 2)
+        t_start = t_rppg[0]
+        time_axis = t_rppg - t_start
+        resp_axis = t_resp - t_start
 
-        duration_sec = len(rppg) / FPS
-        time_axis = np.linspace(0, duration_sec, len(rppg))
-        bpm = len(peaks_rppg) * (60 / duration_sec)
-        br = len(peaks_resp) * (60 / duration_sec)
+        # Puncak dari detektor online yang berada di dalam jendela tampilan
+        peak_t_rppg = self.hr_peaks.peaks.timestamps()
+        peak_t_rppg = peak_t_rppg[(peak_t_rppg >= t_rppg[0]) & (peak_t_rppg <= t_rppg[-1])]
 
-        self.bpm_label.config(text=f"BPM: {bpm:.1f}")
-        self.br_label.config(text=f"BR: {br:.1f}")
+        bpm = self.hr_peaks.rate(n=10)
+        br = self.br_peaks.rate(n=5)
+        hrv = self.hr_peaks.hrv(n=30)
+        self.bpm_label.config(text=f"BPM: {bpm:.1f}" if np.isfinite(bpm) else "BPM: -")
+        self.br_label.config(text=f"BR: {br:.1f}" if np.isfinite(br) else "BR: -")
+        self.hrv_label.config(text=f"RMSSD: {hrv['rmssd']:.0f} ms, SDNN: {hrv['sdnn']:.0f} ms"
+                              if np.isfinite(hrv["rmssd"]) else "HRV: -")
+        self.update_summary(bpm, br)
 
         self.ax_rppg.clear()
         self.ax_resp.clear()
 
         self.ax_rppg.plot(time_axis, rppg, color='blue', label="rPPG")
-        self.ax_rppg.plot(time_axis[peaks_rppg], rppg[peaks_rppg], 'rx', label="Peak")
+        self.ax_rppg.plot(peak_t_rppg - t_start, np.interp(peak_t_rppg, t_rppg, rppg), 'rx', label="Peak")
+        # Tandai sampel yang direkam saat kualitas sinyal rendah
+        _, sqi_uniform = resample_uniform(self.sqi_buffer, self.sqi_buffer.timestamps(), fs_rppg)
+        low_q = np.flatnonzero(sqi_uniform[:len(rppg)] < SQI_THRESH)
+        if low_q.size:
+            self.ax_rppg.plot(time_axis[low_q], rppg[low_q], '.', color='gray', label="SQI rendah")
         self.ax_rppg.set_title("rPPG Signal (Remote PPG)", fontsize=12)
         self.ax_rppg.set_xlabel("Time (seconds)", fontsize=10)
         self.ax_rppg.set_ylabel("Amplitude", fontsize=10)
@@ -403,23 +731,44 @@ class GUIApp:
         self.ax_rppg.grid(True)
         self.ax_rppg.tick_params(axis='both', labelsize=8)
 
-        self.ax_resp.plot(time_axis[:len(resp)], resp, color='green', label="Respiration")
-        self.ax_resp.plot(time_axis[peaks_resp], resp[peaks_resp], 'rx', label="Peak")
+        if resp is not None:
+            peak_t_resp = self.br_peaks.peaks.timestamps()
+            peak_t_resp = peak_t_resp[(peak_t_resp >= t_resp[0]) & (peak_t_resp <= t_resp[-1])]
+            self.ax_resp.plot(resp_axis, resp, color='green', label="Respiration")
+            self.ax_resp.plot(peak_t_resp - t_start, np.interp(peak_t_resp, t_resp, resp), 'rx', label="Peak")
+            self.ax_resp.legend(fontsize=9)
         self.ax_resp.set_title("Respiration Signal (Chest Movement)", fontsize=12)
         self.ax_resp.set_xlabel("Time (seconds)", fontsize=10)
         self.ax_resp.set_ylabel("Displacement (px)", fontsize=10)
-        self.ax_resp.legend(fontsize=9)
         self.ax_resp.grid(True)
         self.ax_resp.tick_params(axis='both', labelsize=8)
 
         self.figure.tight_layout(pad=3.0)
         self.canvas_plot.draw()
 
+    def update_summary(self, bpm, br):
+        """
+        Menambahkan estimasi BPM/BR terbaru ke ringkasan per menit (mode monitoring),
+        menulis periode yang selesai ke disk, dan memperbarui label ringkasan.
+        """
+        if self.summary is None or len(self.rgb_buffer) == 0:
+            return
+        finished = self.summary.add(self.rgb_buffer.timestamps()[-1], bpm, br, self.sqi.value)
+        if finished is None:
+            return
+        t_period, row = finished
+        self.monitor_spiller.write_row("summary", t_period, row)
+        hr_min, hr_mean, hr_max, br_min, br_mean, br_max, quality = row
+        self.summary_label.config(
+            text=f"1 menit terakhir — HR {hr_min:.0f}/{hr_mean:.0f}/{hr_max:.0f}, "
+                 f"BR {br_min:.0f}/{br_mean:.0f}/{br_max:.0f} (min/mean/max), SQI {quality:.2f}")
+
     def exit_program(self):
         """
         Menghentikan webcam dan menutup GUI.
         Dipanggil saat klik tombol ❌ atau tekan tombol Escape.
         """
+        self.optim_stop.set()
         self.cap.release()
         self.master.destroy()
 
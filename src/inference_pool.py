@@ -0,0 +1,209 @@
+import multiprocessing as mp_proc
+from multiprocessing import shared_memory
+import queue
+import time
+
+import cv2
+import numpy as np
+
+
+def create_face_detector(model_path: str, min_confidence: float = 0.3):
+    """
+    Memuat model `face_detector` MediaPipe dalam mode VIDEO.
+
+    Parameter:
+    - model_path: path ke file .tflite
+    - min_confidence: ambang kepercayaan deteksi minimum
+
+    Return:
+    - objek FaceDetector yang sudah diinisialisasi
+    """
+    from mediapipe.tasks import python as mp_tasks
+    from mediapipe.tasks.python import vision
+
+    options = vision.FaceDetectorOptions(
+        base_options=mp_tasks.BaseOptions(model_asset_path=model_path),
+        running_mode=vision.RunningMode.VIDEO,
+        min_detection_confidence=min_confidence
+    )
+    return vision.FaceDetector.create_from_options(options)
+
+
+def _worker_loop(kind, model_path, shm_name, shape, n_slots, tasks, results):
+    """
+    Loop proses worker: membaca frame dari ring shared memory berdasarkan nomor slot,
+    menjalankan inferensi pada salinan kecil, dan mengirim hasil dalam koordinat asli.
+    Setelah model termuat, worker mengirim pesan siap (slot = -1).
+    """
+    import mediapipe as mp
+    from frame_utils import downscale, scale_box
+    from resp_utils import create_pose_landmarker
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray((n_slots,) + tuple(shape), dtype=np.uint8, buffer=shm.buf)
+    detector = create_face_detector(model_path) if kind == "face" else create_pose_landmarker(model_path)
+    h, w = shape[:2]
+    last_ts = -1
+    results.put((kind, -1, -1, None))
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            frame_idx, slot, timestamp_ms = task
+            small, scale = downscale(ring[slot])
+            mp_img = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+            # MediaPipe mode VIDEO mensyaratkan timestamp naik tegas
+            last_ts = max(int(timestamp_ms), last_ts + 1)
+            out = None
+            if kind == "face":
+                res = detector.detect_for_video(mp_img, last_ts)
+                if res.detections:
+                    bb = res.detections[0].bounding_box
+                    out = scale_box((bb.origin_x, bb.origin_y, bb.width, bb.height), scale)
+            else:
+                res = detector.detect_for_video(mp_img, timestamp_ms=last_ts)
+                if res.pose_landmarks:
+                    lm = res.pose_landmarks[0]
+                    ls, rs = lm[11], lm[12]
+                    out = [(ls.x * w, ls.y * h), (rs.x * w, rs.y * h)]
+            results.put((kind, frame_idx, slot, out))
+    finally:
+        detector.close()
+        del ring
+        shm.close()
+
+
+class InferencePool:
+    """
+    Pool proses worker untuk inferensi MediaPipe (face detector dan pose landmarker).
+
+    Frame ditulis ke ring buffer shared memory; worker hanya menerima (indeks frame, slot,
+    timestamp), sehingga piksel frame tidak pernah di-pickle. Hasil dikembalikan per indeks
+    frame. Slot baru dipakai ulang setelah semua worker selesai membacanya; jika ring penuh,
+    frame dilewati (tidak diinferensi) agar proses utama tidak pernah menunggu. Worker yang
+    berhenti (mis. file model tidak ada) dilaporkan sebagai RuntimeError oleh `wait_ready`/`poll`.
+
+    Parameter:
+    - frame_shape: shape frame BGR (h, w, 3)
+    - face_model_path: path model face detector (.tflite)
+    - pose_model_path: path model pose landmarker (.task)
+    - n_slots: jumlah slot frame di ring shared memory
+    """
+    KINDS = ("face", "pose")
+
+    def __init__(self, frame_shape, face_model_path: str, pose_model_path: str, n_slots: int = 8):
+        self.shape = tuple(frame_shape)
+        self.n_slots = n_slots
+        self.model_paths = {"face": face_model_path, "pose": pose_model_path}
+        self._ctx = mp_proc.get_context("spawn")
+        self._shm = None
+        self._ring = None
+        self._tasks = {}
+        self._results = None
+        self._procs = []
+        self._refs = [0] * n_slots
+        self._next = 0
+        self._ready = set()
+
+    def start(self):
+        """
+        Mengalokasikan shared memory dan menjalankan satu proses per model.
+        """
+        nbytes = int(np.prod(self.shape)) * self.n_slots
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._ring = np.ndarray((self.n_slots,) + self.shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._results = self._ctx.Queue()
+        for kind in self.KINDS:
+            self._tasks[kind] = self._ctx.Queue()
+            proc = self._ctx.Process(
+                target=_worker_loop,
+                args=(kind, self.model_paths[kind], self._shm.name, self.shape, self.n_slots,
+                      self._tasks[kind], self._results),
+                daemon=True
+            )
+            proc.start()
+            self._procs.append(proc)
+
+    def _check_workers(self):
+        for kind, proc in zip(self.KINDS, self._procs):
+            if proc.exitcode is not None:
+                raise RuntimeError(f"Worker inferensi '{kind}' berhenti (exitcode {proc.exitcode}). "
+                                   f"Periksa file model: {self.model_paths[kind]}")
+
+    def wait_ready(self, timeout: float = 30.0) -> bool:
+        """
+        Menunggu sampai semua worker selesai memuat model.
+
+        Return:
+        - True jika semua worker siap, False jika timeout
+        """
+        deadline = time.monotonic() + timeout
+        while len(self._ready) < len(self.KINDS):
+            self._check_workers()
+            try:
+                kind, _, slot, _ = self._results.get(timeout=0.1)
+            except queue.Empty:
+                if time.monotonic() > deadline:
+                    return False
+                continue
+            if slot < 0:
+                self._ready.add(kind)
+        return True
+
+    def submit(self, frame: np.ndarray, frame_idx: int, timestamp_ms: int) -> bool:
+        """
+        Menyalin frame ke slot bebas berikutnya dan mengirim tugas ke semua worker.
+
+        Return:
+        - True jika frame dikirim, False jika ring penuh atau ukuran frame tidak cocok
+        """
+        slot = self._next
+        if self._refs[slot] > 0 or frame.shape != self.shape:
+            return False
+        self._ring[slot] = frame
+        self._refs[slot] = len(self.KINDS)
+        for kind in self.KINDS:
+            self._tasks[kind].put((frame_idx, slot, timestamp_ms))
+        self._next = (slot + 1) % self.n_slots
+        return True
+
+    def poll(self):
+        """
+        Mengambil semua hasil yang sudah tersedia tanpa menunggu. RuntimeError dilempar jika
+        ada worker yang berhenti, karena slot yang dipegangnya tidak akan pernah dilepas.
+
+        Return:
+        - list (kind, frame_idx, hasil); hasil face = (x, y, w, h), hasil pose =
+          [(x_kiri, y_kiri), (x_kanan, y_kanan)] dalam piksel asli, atau None
+        """
+        self._check_workers()
+        out = []
+        while True:
+            try:
+                kind, frame_idx, slot, result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if slot < 0:
+                self._ready.add(kind)
+                continue
+            self._refs[slot] -= 1
+            out.append((kind, frame_idx, result))
+        return out
+
+    def close(self):
+        """
+        Menghentikan worker dan melepaskan shared memory.
+        """
+        for q in self._tasks.values():
+            q.put(None)
+        for proc in self._procs:
+            proc.join(timeout=2.0)
+            if proc.is_alive():
+                proc.terminate()
+        self._procs = []
+        if self._shm is not None:
+            self._ring = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
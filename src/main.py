@@ -3,13 +3,19 @@ import numpy as np
 import matplotlib.pyplot as plt
 import mediapipe as mp
 import os
+import time
 
 from mediapipe.tasks import python as mp_tasks
 from mediapipe.tasks.python import vision
 
 from rppg_utils import extract_rppg
-from resp_utils import create_pose_landmarker, RespTracker
-from filter_utils import bandpass_filter
+from resp_utils import create_pose_landmarker, RESP_TRACKERS
+from filter_utils import bandpass_filter, resample_uniform, min_filter_length
+from buffer_utils import RingBuffer
+from frame_utils import downscale, scale_box, to_display, face_roi
+from quality_utils import SignalQuality
+from session_utils import SessionRecorder
+from datetime import datetime
 
 # --- Parameter ---
 FPS        = 30.0
@@ -18,6 +24,14 @@ LOW_RPPG   = 0.8
 HIGH_RPPG  = 2.5
 LOW_RESP   = 0.1
 HIGH_RESP  = 0.7
+BUFFER_SEC = 30
+LOW_POWER  = False   # True: rPPG diproses pada 15 fps, respirasi 10 fps
+FS_RPPG    = 15.0 if LOW_POWER else FPS
+FS_RESP    = 10.0 if LOW_POWER else FPS
+SQI_THRESH = 0.5     # ambang indeks kualitas sinyal
+RESP_METHOD = "LK"     # "LK" atau "Phase" (phase correlation, biaya per frame tetap)
+RECORD_SESSION = False  # simpan bundle sesi untuk replay; cache ditahan di RAM sampai selesai,
+                        # jadi aktifkan hanya untuk sesi pendek (loop ini berjalan sampai Q ditekan)
 # -----------------
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -75,9 +89,17 @@ def main():
     )   
     print("[DEBUG] Loading pose landmarker model from path...")
     pose_landmarker = create_pose_landmarker(pose_path)
-    resp_tracker = RespTracker(pose_landmarker, x_size=150, y_size=120, shift_x=0, shift_y=40)
-
-    rgb_buffer, resp_buffer = [], []
+    resp_tracker = RESP_TRACKERS[RESP_METHOD](pose_landmarker, x_size=150, y_size=120, shift_x=0, shift_y=40)
+
+    rgb_buffer  = RingBuffer(int(BUFFER_SEC * FPS), channels=3)
+    resp_buffer = RingBuffer(int(BUFFER_SEC * FPS))
+    sqi_buffer  = RingBuffer(int(BUFFER_SEC * FPS))   # SQI per sampel RGB (penanda kualitas)
+    sqi = SignalQuality(threshold=SQI_THRESH)
+    recorder = None
+    if RECORD_SESSION:
+        session_dir = os.path.join("sessions", datetime.now().strftime("%Y%m%d_%H%M%S"))
+        recorder = SessionRecorder(session_dir, fps=FPS)
+        print(f"[DEBUG] Recording session bundle to: {session_dir}")
 
     plt.ion()
     fig, (ax_rppg, ax_resp) = plt.subplots(2, 1, figsize=(6, 6))
@@ -87,20 +109,24 @@ def main():
 
     frame_idx = 0
     initialized = False
+    next_resp_time = -np.inf
 
     try:
         show_countdown_overlay(cap, duration=5)
+        t0 = time.monotonic()
         while True:
             ret, frame = cap.read()
             print(f"[DEBUG] Frame {frame_idx}: ret={ret}")
             if not ret:
                 break
-            frame = cv2.resize(frame, (960, 720)) 
+            capture_time = time.monotonic() - t0
 
-            img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # Deteksi pada salinan kecil; ROI dan optical flow tetap pada resolusi asli
+            small, scale = downscale(frame)
+            img_rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
             mp_img  = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
 
-            timestamp_ms = int(cap.get(cv2.CAP_PROP_POS_MSEC))
+            timestamp_ms = int(capture_time * 1000)
             res = face_detector.detect_for_video(mp_img, timestamp_ms)
             num_det = len(res.detections)
             print(f"[DEBUG] Tasks detections: {num_det}")
@@ -109,7 +135,7 @@ def main():
                 sol = sol_face_det.process(img_rgb)
                 if sol.detections:
                     d = sol.detections[0].location_data.relative_bounding_box
-                    fh, fw = frame.shape[:2]
+                    fh, fw = small.shape[:2]
                     x = int(d.xmin * fw)
                     y = int(d.ymin * fh)
                     W = int(d.width * fw)
@@ -127,32 +153,43 @@ def main():
                     print("[DEBUG] Fallback Sol API detection used")
 
             if num_det == 0:
-                cv2.putText(frame, "No face detected", (10,30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,0,255), 2)
-                cv2.imshow("Webcam", frame)
+                sqi.update(face_present=False)
+                if recorder is not None:
+                    recorder.add_frame(frame, capture_time)
+                display = to_display(frame)
+                cv2.putText(display, "No face detected", (10,30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,0,255), 2)
+                cv2.imshow("Webcam", display)
                 if cv2.waitKey(1) & 0xFF == ord('q'): break
                 frame_idx += 1
                 continue
 
             det  = res.detections[0]
             bbox = det.bounding_box
-            x, y = int(bbox.origin_x), int(bbox.origin_y)
-            W, H = int(bbox.width),    int(bbox.height)
-
-            cx, cy = x + W//2, y + H//2
-            R = min(W, H) // 3
-            l, r = max(0, cx - R), min(frame.shape[1], cx + R)
-            t, b = max(0, cy - R), min(frame.shape[0], cy + R)
+            # Petakan bounding box dari frame kecil ke resolusi asli
+            face_box = scale_box((bbox.origin_x, bbox.origin_y, bbox.width, bbox.height), scale)
+            l, t, r, b = face_roi(face_box, frame.shape)
 
             if r - l <= 0 or b - t <= 0:
                 print("[DEBUG] Invalid ROI size, skipping.")
+                if recorder is not None:
+                    recorder.add_frame(frame, capture_time, face_box=face_box)
                 frame_idx += 1
                 continue
 
             roi = frame[t:b, l:r]
-            cv2.rectangle(frame, (l, t), (r, b), (0,255,0), 2)
-
             mean_bgr = cv2.mean(roi)[:3]
-            rgb_buffer.append([mean_bgr[2], mean_bgr[1], mean_bgr[0]])
+            rgb_mean = [mean_bgr[2], mean_bgr[1], mean_bgr[0]]
+            rgb_buffer.append(rgb_mean, timestamp=capture_time)
+
+            # Indeks kualitas sinyal: wajah, gerak ROI, saturasi; fitur LK tersisa hanya untuk respirasi
+            n_features = resp_tracker.feature_count() if initialized else None
+            sqi.update(face_present=True, roi=roi, rgb_mean=rgb_mean, n_features=n_features)
+            sqi_buffer.append(sqi.frame_score, timestamp=capture_time)
+
+            # Fitur LK tidak pernah dideteksi ulang: jika runtuh, inisialisasi ulang dari pose
+            if initialized and not sqi.resp_ok():
+                initialized = False
+                print("[DEBUG] LK features lost, re-initializing RespTracker.")
 
             if not initialized:
                 try:
@@ -162,15 +199,18 @@ def main():
                 except Exception as e:
                     print("[DEBUG] RespTracker init failed:", e)
 
-            if initialized:
+            # Desimasi tracking respirasi hanya pada mode hemat daya (jadwal tetap 1/FS_RESP)
+            resp_sample = None
+            if initialized and (not LOW_POWER or capture_time >= next_resp_time):
                 try:
                     # Update Optical Flow untuk sinyal respirasi
                     resp_y = resp_tracker.update(frame)
-                    resp_buffer.append(resp_y)
+                    if np.isfinite(resp_y):
+                        resp_sample = resp_y
+                        resp_buffer.append(resp_y, timestamp=capture_time)
+                    next_resp_time = max(next_resp_time, capture_time - 1.0 / FS_RESP) + 1.0 / FS_RESP
 
                     # Update ulang titik bahu dari pose terbaru
-                    img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    mp_img = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
                     res = pose_landmarker.detect_for_video(mp_img, timestamp_ms=timestamp_ms)
                     if res.pose_landmarks:
                         lm = res.pose_landmarks[0]
@@ -178,39 +218,70 @@ def main():
                         h, w = frame.shape[:2]
                         resp_tracker.shoulder_pts = [(int(ls.x * w), int(ls.y * h)), (int(rs.x * w), int(rs.y * h))]
 
-                    # Gambar titik bahu terbaru
-                    if resp_tracker.shoulder_pts:
-                        for pt in resp_tracker.shoulder_pts:
-                            cv2.circle(frame, pt, radius=5, color=(0, 0, 255), thickness=-1)
-
                 except Exception as e:
                     print("[DEBUG] RespTracker update failed:", e)
 
 
+            if recorder is not None:
+                recorder.add_frame(frame, capture_time, face_box=face_box,
+                                   shoulders=resp_tracker.shoulder_pts if initialized else None,
+                                   rgb_mean=rgb_mean,
+                                   features=resp_tracker.feature_points() if initialized else None,
+                                   resp=resp_sample)
+
+            # Overlay digambar setelah sinyal diambil agar tidak mencemari ROI
+            cv2.rectangle(frame, (l, t), (r, b), (0,255,0) if sqi.frame_ok() else (0,0,255), 2)
+            # Gambar titik bahu terbaru
+            if initialized and resp_tracker.shoulder_pts:
+                for pt in resp_tracker.shoulder_pts:
+                    cv2.circle(frame, pt, radius=5, color=(0, 0, 255), thickness=-1)
+            display = to_display(frame)
+            cv2.putText(display, f"SQI: {sqi.value:.2f}", (10,30), cv2.FONT_HERSHEY_SIMPLEX, 0.7,
+                        (0,255,0) if sqi.is_good() else (0,0,255), 2)
+
             # Tambahkan teks instruksi
-            cv2.putText(frame, "Tekan Q untuk selesai", (20, frame.shape[0] - 20),
+            cv2.putText(display, "Tekan Q untuk selesai", (20, display.shape[0] - 20),
             cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            cv2.imshow("Webcam", frame)
+            cv2.imshow("Webcam", display)
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
 
             frame_idx += 1
-            if frame_idx % 10 == 0 and len(rgb_buffer) >= WIN_POS:
-                rgb_arr = np.array(rgb_buffer).T
-                rppg_sig = extract_rppg(rgb_arr, fps=FPS, lowcut=LOW_RPPG, highcut=HIGH_RPPG)
-                resp_sig = bandpass_filter(np.array(resp_buffer), LOW_RESP, HIGH_RESP, fs=FPS)
+            # POS, filtering, dan redraw ditunda selama kualitas sinyal rendah
+            if frame_idx % 10 == 0 and len(rgb_buffer) >= WIN_POS and sqi.frame_ok():
+                # Resample ke timebase seragam berdasarkan timestamp tangkap sebenarnya
+                # Panjang dicek setelah resampling karena laju proses bisa lebih rendah dari FPS
+                _, rgb_uniform = resample_uniform(rgb_buffer, rgb_buffer.timestamps(), FS_RPPG)
+                if rgb_uniform.shape[-1] < min_filter_length():
+                    continue
+                _, resp_uniform = resample_uniform(resp_buffer, resp_buffer.timestamps(), FS_RESP)
+                rppg_sig = extract_rppg(rgb_uniform, fps=FS_RPPG, lowcut=LOW_RPPG, highcut=HIGH_RPPG)
+                # Sinyal respirasi baru tersedia setelah pelacak bahu terinisialisasi
+                resp_sig = None
+                if resp_uniform.size >= min_filter_length():
+                    resp_sig = bandpass_filter(resp_uniform, LOW_RESP, HIGH_RESP, fs=FS_RESP)
+                sqi.update_snr(rppg_sig, FS_RPPG, LOW_RPPG, HIGH_RPPG)
+                if not sqi.is_good():
+                    continue
 
                 ax_rppg.cla(); ax_resp.cla()
 
                 ax_rppg.plot(rppg_sig, color='blue', label='rPPG')
+                # Tandai sampel yang direkam saat kualitas sinyal rendah
+                _, sqi_uniform = resample_uniform(sqi_buffer, sqi_buffer.timestamps(), FS_RPPG)
+                low_q = np.flatnonzero(sqi_uniform[:len(rppg_sig)] < SQI_THRESH)
+                if low_q.size:
+                    ax_rppg.plot(low_q, rppg_sig[low_q], '.', color='gray', label='SQI rendah')
                 ax_rppg.set_title("Sinyal rPPG (detak jantung)")
                 ax_rppg.set_xlabel("Frame ke-"); ax_rppg.set_ylabel("Amplitudo")
                 ax_rppg.legend(); ax_rppg.grid(True)
 
-                ax_resp.plot(resp_sig, color='green', label='Respirasi')
+                if resp_sig is not None:
+                    ax_resp.plot(resp_sig, color='green', label='Respirasi')
+                    ax_resp.legend()
                 ax_resp.set_title("Sinyal Respirasi (gerak bahu)")
                 ax_resp.set_xlabel("Frame ke-"); ax_resp.set_ylabel("Posisi Y (px)")
-                ax_resp.legend(); ax_resp.grid(True)
+                ax_resp.grid(True)
 
                 fig.tight_layout()
                 fig.canvas.draw(); plt.pause(0.001)
@@ -218,6 +289,8 @@ def main():
     finally:
         print("[DEBUG] Releasing resources...")
         cap.release()
+        if recorder is not None:
+            recorder.close()
         cv2.destroyAllWindows()
         face_detector.close()
         sol_face_det.close()
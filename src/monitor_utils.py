@@ -0,0 +1,139 @@
+import os
+import numpy as np
+
+from buffer_utils import RingBuffer
+
+SUMMARY_FIELDS = ("hr_min", "hr_mean", "hr_max", "br_min", "br_mean", "br_max", "quality")
+
+
+class RollingSummary:
+    """
+    Ringkasan HR/BR bergulir per periode (default per menit): min/mean/max dan rata-rata kualitas.
+    Akumulasi bernilai O(1) per pembaruan dan riwayat disimpan dalam RingBuffer berukuran tetap,
+    sehingga memori tetap datar pada pemantauan berjam-jam.
+
+    Parameter:
+    - period: panjang periode ringkasan (detik)
+    - history: jumlah periode yang disimpan (default 1440 = 24 jam per menit)
+    """
+    def __init__(self, period: float = 60.0, history: int = 1440):
+        self.period = period
+        self.history = RingBuffer(history, channels=len(SUMMARY_FIELDS))
+        self._start = None
+        self._reset_acc()
+
+    def _reset_acc(self):
+        self._hr = [np.inf, 0.0, -np.inf, 0]   # min, sum, max, count
+        self._br = [np.inf, 0.0, -np.inf, 0]
+        self._q_sum = 0.0
+        self._q_count = 0
+
+    @staticmethod
+    def _acc(acc, value):
+        if value is None or not np.isfinite(value):
+            return
+        acc[0] = min(acc[0], value)
+        acc[1] += value
+        acc[2] = max(acc[2], value)
+        acc[3] += 1
+
+    @staticmethod
+    def _stats(acc):
+        if acc[3] == 0:
+            return np.nan, np.nan, np.nan
+        return acc[0], acc[1] / acc[3], acc[2]
+
+    def add(self, t: float, hr=None, br=None, quality=None):
+        """
+        Menambahkan satu estimasi HR/BR pada waktu t (detik).
+
+        Return:
+        - (t_periode, baris ringkasan) jika sebuah periode selesai, selain itu None
+        """
+        if self._start is None:
+            self._start = t
+        row = None
+        if t - self._start >= self.period:
+            row = self.finalize()
+            self._start = t
+        self._acc(self._hr, hr)
+        self._acc(self._br, br)
+        if quality is not None:
+            self._q_sum += quality
+            self._q_count += 1
+        return row
+
+    def finalize(self):
+        """
+        Menutup periode berjalan, menyimpannya ke riwayat, dan memulai periode baru.
+
+        Return:
+        - (t_periode, baris ringkasan sepanjang SUMMARY_FIELDS), atau None jika belum ada
+          periode yang dimulai (belum pernah ada estimasi)
+        """
+        if self._start is None:
+            return None
+        quality = self._q_sum / self._q_count if self._q_count else np.nan
+        row = np.array(self._stats(self._hr) + self._stats(self._br) + (quality,))
+        t_period = self._start
+        self.history.append(row, timestamp=t_period)
+        self._reset_acc()
+        return t_period, row
+
+
+class ChunkSpiller:
+    """
+    Menulis potongan data yang sudah final dari RingBuffer ke file CSV secara periodik.
+    Hanya sampel yang lebih baru dari spill sebelumnya yang ditulis (mode append).
+
+    Parameter:
+    - directory: direktori tujuan file CSV
+    - interval: jarak waktu antar spill (detik); harus lebih pendek dari panjang RingBuffer
+    """
+    def __init__(self, directory: str, interval: float = 10.0):
+        self.directory = directory
+        self.interval = interval
+        self._last_spill = None
+        self._last_ts = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def due(self, t: float) -> bool:
+        """
+        True jika sudah waktunya melakukan spill.
+        """
+        if self._last_spill is None:
+            self._last_spill = t
+        return t - self._last_spill >= self.interval
+
+    def spill(self, name: str, buffer: RingBuffer, extra=None):
+        """
+        Menambahkan sampel baru dari buffer ke `<directory>/<name>.csv` (kolom pertama = waktu).
+
+        Parameter:
+        - name: nama file tanpa ekstensi
+        - buffer: RingBuffer sumber
+        - extra: RingBuffer tambahan yang selaras (mis. SQI), ditulis sebagai kolom terakhir
+        """
+        ts = buffer.timestamps()
+        new = ts > self._last_ts.get(name, -np.inf)
+        if not np.any(new):
+            return
+        cols = [ts[new], buffer.latest()[..., new].T]
+        if extra is not None:
+            cols.append(extra.latest()[..., new].T)
+        with open(os.path.join(self.directory, f"{name}.csv"), "a") as f:
+            np.savetxt(f, np.column_stack(cols), delimiter=",")
+        self._last_ts[name] = ts[new][-1]
+
+    def write_row(self, name: str, t: float, row):
+        """
+        Menambahkan satu baris (mis. ringkasan per menit) ke `<directory>/<name>.csv`.
+        """
+        with open(os.path.join(self.directory, f"{name}.csv"), "a") as f:
+            np.savetxt(f, np.concatenate([[t], row])[np.newaxis, :], delimiter=",")
+
+    def mark(self, t: float):
+        """
+        Mencatat waktu spill terakhir.
+        """
+        self._last_spill = t
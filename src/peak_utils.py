@@ -0,0 +1,100 @@
+import numpy as np
+
+from buffer_utils import RingBuffer
+
+
+class PeakDetector:
+    """
+    Detektor puncak online untuk sinyal yang sudah difilter, diproses per sampel.
+
+    Menggunakan ambang adaptif (fraksi dari envelope amplitudo yang meluruh), periode
+    refraktori, dan interpolasi parabola sub-sampel untuk timestamp puncak. Interval antar
+    puncak (IBI / interval napas) disimpan dalam RingBuffer berukuran tetap sehingga biaya
+    per sampel konstan.
+
+    Parameter:
+    - refractory: jarak minimum antar puncak (detik)
+    - threshold: fraksi envelope yang harus dilampaui puncak (0–1)
+    - decay_time: konstanta waktu peluruhan envelope (detik)
+    - history: jumlah puncak/interval yang disimpan
+    """
+    def __init__(self, refractory: float = 0.33, threshold: float = 0.3,
+                 decay_time: float = 2.0, history: int = 64):
+        self.refractory = refractory
+        self.threshold = threshold
+        self.decay_time = decay_time
+        self.peaks = RingBuffer(history)      # amplitudo puncak, timestamp = waktu puncak
+        self.intervals = RingBuffer(history)  # interval antar puncak (detik)
+        self.reset()
+
+    def reset(self):
+        """
+        Mengosongkan state sampel dan puncak terakhir (mis. setelah jeda kualitas rendah),
+        sehingga celah tidak tercatat sebagai satu interval panjang.
+        """
+        self.env = 0.0
+        self.last_peak = None
+        self._y = []
+        self._t = []
+
+    def update(self, x: float, t: float):
+        """
+        Memproses satu sampel.
+
+        Parameter:
+        - x: nilai sampel terfilter
+        - t: timestamp sampel (detik)
+
+        Return:
+        - (t_puncak, amplitudo) jika sampel sebelumnya adalah puncak, selain itu None
+        """
+        event = None
+        if self._t:
+            decay = np.exp(-(t - self._t[-1]) / self.decay_time)
+            self.env = max(abs(x), self.env * decay)
+        else:
+            self.env = abs(x)
+
+        if len(self._y) == 2:
+            y0, y1 = self._y
+            t0, t1 = self._t
+            if y1 > y0 and y1 >= x and y1 > self.threshold * self.env:
+                # Interpolasi parabola tiga titik untuk posisi puncak sub-sampel
+                denom = y0 - 2 * y1 + x
+                delta = float(np.clip(0.5 * (y0 - x) / denom, -0.5, 0.5)) if denom != 0 else 0.0
+                t_peak = t1 + delta * (t - t0) / 2
+                amp = y1 - 0.25 * (y0 - x) * delta
+                if self.last_peak is None or t_peak - self.last_peak >= self.refractory:
+                    if self.last_peak is not None:
+                        self.intervals.append(t_peak - self.last_peak, timestamp=t_peak)
+                    self.peaks.append(amp, timestamp=t_peak)
+                    self.last_peak = t_peak
+                    event = (t_peak, amp)
+            self._y = [y1, x]
+            self._t = [t1, t]
+        else:
+            self._y.append(x)
+            self._t.append(t)
+        return event
+
+    def rate(self, n: int = 10) -> float:
+        """
+        Laju per menit dari rata-rata n interval terakhir (NaN jika belum ada interval).
+        """
+        ibi = self.intervals.latest(n)
+        return 60.0 / np.mean(ibi) if len(ibi) else np.nan
+
+    def hrv(self, n: int = 30) -> dict:
+        """
+        Metrik variabilitas dari n interval terakhir.
+
+        Return:
+        - dict berisi rmssd dan sdnn dalam milidetik (NaN jika interval belum cukup)
+        """
+        ibi = self.intervals.latest(n) * 1000.0
+        if len(ibi) < 2:
+            return {"rmssd": np.nan, "sdnn": np.nan}
+        return {
+            "rmssd": float(np.sqrt(np.mean(np.diff(ibi) ** 2))),
+            "sdnn": float(np.std(ibi, ddof=1)),
+        }
@@ -0,0 +1,143 @@
+import cv2
+import numpy as np
+
+
+def spectral_snr(data: np.ndarray, fs: float, lowcut: float, highcut: float, half_width: float = 0.1) -> float:
+    """
+    Menghitung SNR spektral dalam pita frekuensi (dB).
+    Sinyal = daya di sekitar puncak dominan (± half_width Hz), noise = sisa daya dalam pita.
+
+    Parameter:
+    - data: sinyal 1D
+    - fs: frekuensi sampling (Hz)
+    - lowcut, highcut: batas pita frekuensi (Hz)
+    - half_width: setengah lebar jendela puncak (Hz)
+
+    Return:
+    - snr_db: SNR dalam dB (-inf jika sinyal kosong)
+    """
+    data = np.asarray(data, dtype=float)
+    if data.size < 2:
+        return -np.inf
+    spec = np.abs(np.fft.rfft(data - np.mean(data))) ** 2
+    freqs = np.fft.rfftfreq(data.size, d=1.0 / fs)
+    band = (freqs >= lowcut) & (freqs <= highcut)
+    if not np.any(band):
+        return -np.inf
+    f_peak = freqs[band][np.argmax(spec[band])]
+    peak = band & (np.abs(freqs - f_peak) <= half_width)
+    p_signal = np.sum(spec[peak])
+    p_noise = np.sum(spec[band & ~peak])
+    return float(10 * np.log10((p_signal + 1e-12) / (p_noise + 1e-12)))
+
+
+class SignalQuality:
+    """
+    Indeks kualitas sinyal (SQI) streaming dalam rentang [0, 1].
+
+    Komponen per frame: keberadaan wajah, energi gerak ROI, dan saturasi/clipping rata-rata RGB.
+    Komponen SNR spektral diperbarui setiap kali sinyal rPPG dihitung. Komponen yang tidak
+    tersedia (None) diabaikan. Jumlah fitur LK yang tersisa dinilai terpisah (`resp_ok`) dan
+    hanya menggerbangi jalur respirasi, sehingga kegagalan pelacak dada tidak mematikan rPPG.
+
+    Parameter:
+    - threshold: ambang kualitas minimum
+    - motion_scale: energi gerak (selisih intensitas rata-rata) yang menurunkan skor ke e^-1
+    - min_features: jumlah fitur LK yang dianggap cukup
+    - snr_range: (dB bawah, dB atas) untuk pemetaan SNR ke [0, 1]
+    - alpha: faktor smoothing EMA untuk skor per frame
+    """
+    def __init__(self, threshold=0.5, motion_scale=8.0, min_features=20,
+                 snr_range=(-3.0, 3.0), alpha=0.3):
+        self.threshold = threshold
+        self.motion_scale = motion_scale
+        self.min_features = min_features
+        self.snr_range = snr_range
+        self.alpha = alpha
+        self.frame_score = 1.0
+        self.snr_score = 1.0
+        self.snr_db = None
+        self.resp_score = 1.0
+        self._prev_thumb = None
+
+    @property
+    def value(self) -> float:
+        """
+        Nilai SQI gabungan (skor per frame × skor SNR).
+        """
+        return self.frame_score * self.snr_score
+
+    def update(self, face_present=None, roi=None, rgb_mean=None, n_features=None) -> float:
+        """
+        Memperbarui skor per frame.
+
+        Parameter:
+        - face_present: True/False jika wajah terdeteksi
+        - roi: potongan ROI BGR untuk energi gerak
+        - rgb_mean: rata-rata (R, G, B) ROI untuk deteksi saturasi/clipping
+        - n_features: jumlah fitur LK yang masih terlacak (hanya memengaruhi `resp_ok`)
+
+        Return:
+        - skor kualitas instan frame ini (sebelum smoothing)
+        """
+        q = 1.0
+        if face_present is not None and not face_present:
+            q = 0.0
+            self._prev_thumb = None
+        if roi is not None and roi.size > 0:
+            thumb = cv2.resize(cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY), (16, 16),
+                               interpolation=cv2.INTER_AREA).astype(np.float32)
+            if self._prev_thumb is not None:
+                energy = float(np.mean(np.abs(thumb - self._prev_thumb)))
+                q *= np.exp(-energy / self.motion_scale)
+            self._prev_thumb = thumb
+        if rgb_mean is not None:
+            rgb_mean = np.asarray(rgb_mean, dtype=float)
+            if np.any(rgb_mean >= 250) or np.any(rgb_mean <= 5):
+                q = 0.0
+        if n_features is not None:
+            self.resp_score = min(1.0, n_features / float(self.min_features))
+
+        self.frame_score += self.alpha * (q - self.frame_score)
+        return q
+
+    def update_snr(self, data: np.ndarray, fs: float, lowcut: float, highcut: float) -> float:
+        """
+        Memperbarui komponen SNR spektral dari sinyal hasil ekstraksi.
+
+        Return:
+        - snr_db: SNR dalam dB
+        """
+        self.snr_db = spectral_snr(data, fs, lowcut, highcut)
+        lo, hi = self.snr_range
+        self.snr_score = float(np.clip((self.snr_db - lo) / (hi - lo), 0.0, 1.0))
+        return self.snr_db
+
+    def frame_ok(self) -> bool:
+        """
+        True jika kualitas per frame cukup untuk menjalankan POS dan filtering.
+        """
+        return self.frame_score >= self.threshold
+
+    def resp_ok(self) -> bool:
+        """
+        True jika fitur LK yang tersisa cukup untuk sinyal respirasi; jika False,
+        pelacak sebaiknya diinisialisasi ulang.
+        """
+        return self.resp_score >= self.threshold
+
+    def is_good(self) -> bool:
+        """
+        True jika kualitas gabungan (termasuk SNR) cukup untuk deteksi puncak dan pelaporan.
+        """
+        return self.value >= self.threshold
+
+    def reset(self):
+        """
+        Mengembalikan seluruh skor ke kondisi awal.
+        """
+        self.frame_score = 1.0
+        self.snr_score = 1.0
+        self.snr_db = None
+        self.resp_score = 1.0
+        self._prev_thumb = None
@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
 import mediapipe as mp
+from frame_utils import downscale
 
 def create_pose_landmarker(model_path: str, use_gpu: bool=False):
     """
@@ -40,56 +41,91 @@ def create_pose_landmarker(model_path: str, use_gpu: bool=False):
 class RespTracker:
     """
     Pelacak sinyal respirasi berdasarkan Optical Flow pada ROI bahu.
+
+    Landmark pose dideteksi pada salinan frame yang diperkecil, sedangkan Optical Flow
+    dihitung hanya pada potongan ROI dada beresolusi asli, sehingga biaya per frame
+    bergantung pada ukuran ROI, bukan resolusi kamera. Ukuran dan pergeseran ROI
+    dinyatakan dalam piksel frame referensi selebar `ref_width`.
     """
-    def __init__(self, landmarker, x_size=100, y_size=100, shift_x=0, shift_y=0):
+    def __init__(self, landmarker, x_size=100, y_size=100, shift_x=0, shift_y=0, ref_width=960, margin=0.25):
         self.landmarker = landmarker
         self.x_size = x_size
         self.y_size = y_size
         self.shift_x = shift_x
         self.shift_y = shift_y
-        self.features = None
+        self.ref_width = ref_width
+        self.margin = margin      # margin potongan tracking relatif terhadap ukuran ROI
+        self.features = None      # koordinat relatif terhadap potongan tracking
         self.old_gray = None
         self.shoulder_pts = None  # (x1, y1), (x2, y2)
         self.lk_params = dict(
             winSize=(15, 15), maxLevel=2,
             criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
         )
-        self.roi = None  # (left, top, right, bottom)
+        self.roi = None        # (left, top, right, bottom)
+        self.track_box = None  # (left, top, right, bottom), ROI + margin
 
     def initialize(self, frame: np.ndarray, timestamp_ms: int):
         """
         Deteksi awal bahu dan pilih titik fitur untuk Optical Flow.
         Params:
-          frame        : frame awal
+          frame        : frame awal (resolusi asli)
           timestamp_ms : waktu frame dalam milidetik (dibutuhkan oleh pose model)
         """
         h, w = frame.shape[:2]
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        small, _ = downscale(frame)
+        img_rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
         mp_img = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
         res = self.landmarker.detect_for_video(mp_img, timestamp_ms=timestamp_ms)
         if not res.pose_landmarks:
             raise RuntimeError("Pose tidak terdeteksi.")
 
+        # Landmark ternormalisasi [0, 1] sehingga langsung dipetakan ke resolusi asli
         lm = res.pose_landmarks[0]
         ls, rs = lm[11], lm[12]
-        cx = int((ls.x + rs.x) * w / 2) + self.shift_x
-        cy = int((ls.y + rs.y) * h / 2) + self.shift_y
-        l = max(0, cx - self.x_size)
-        r = min(w, cx + self.x_size)
-        t = max(0, cy - self.y_size)
-        b = min(h, cy + self.y_size)
+        self.initialize_from_shoulders(frame, [(ls.x * w, ls.y * h), (rs.x * w, rs.y * h)])
+
+    def initialize_from_shoulders(self, frame: np.ndarray, shoulders):
+        """
+        Inisialisasi ROI dan fitur Optical Flow dari titik bahu yang sudah diketahui
+        (mis. dari cache sesi), tanpa menjalankan inferensi pose.
+        Params:
+          frame     : frame awal (resolusi asli)
+          shoulders : [(x_kiri, y_kiri), (x_kanan, y_kanan)] dalam piksel resolusi asli
+        """
+        h, w = frame.shape[:2]
+        k = w / float(self.ref_width)
+        x_size, y_size = int(self.x_size * k), int(self.y_size * k)
+        (lx, ly), (rx, ry) = shoulders
+        cx = int((lx + rx) / 2) + int(self.shift_x * k)
+        cy = int((ly + ry) / 2) + int(self.shift_y * k)
+        l = max(0, cx - x_size)
+        r = min(w, cx + x_size)
+        t = max(0, cy - y_size)
+        b = min(h, cy + y_size)
         self.roi = (l, t, r, b)
-        self.shoulder_pts = [(int(ls.x * w), int(ls.y * h)), (int(rs.x * w), int(rs.y * h))]
+        self.shoulder_pts = [(int(lx), int(ly)), (int(rx), int(ry))]
+        self._init_tracking(frame)
 
+    def _init_tracking(self, frame: np.ndarray):
+        """
+        Memilih titik fitur LK di dalam ROI dada (dipanggil setelah ROI ditentukan).
+        """
+        h, w = frame.shape[:2]
+        l, t, r, b = self.roi
+        mx, my = int((r - l) * self.margin), int((b - t) * self.margin)
+        tl, tt = max(0, l - mx), max(0, t - my)
+        tr, tb = min(w, r + mx), min(h, b + my)
+        self.track_box = (tl, tt, tr, tb)
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        self.old_gray = gray.copy()
-        chest = gray[t:b, l:r]
+        gray = cv2.cvtColor(frame[tt:tb, tl:tr], cv2.COLOR_BGR2GRAY)
+        self.old_gray = gray
+        chest = gray[t - tt:b - tt, l - tl:r - tl]
         pts = cv2.goodFeaturesToTrack(chest, maxCorners=1000, qualityLevel=0.01, minDistance=3, blockSize=7)
         if pts is None:
             raise RuntimeError("Gagal menemukan feature untuk tracking.")
-        pts[:, :, 0] += l
-        pts[:, :, 1] += t
+        pts[:, :, 0] += l - tl
+        pts[:, :, 1] += t - tt
         self.features = np.float32(pts)
 
     def update(self, frame: np.ndarray) -> float:
@@ -97,14 +133,136 @@ class RespTracker:
         Melacak Optical Flow dan mengembalikan posisi vertikal rata-rata.
 
         Parameter:
-        - frame: frame gambar
+        - frame: frame gambar (resolusi asli)
 
         Return:
-        - nilai rata-rata posisi y dari fitur pelacakan
+        - nilai rata-rata posisi y (piksel resolusi asli) dari fitur pelacakan
         """
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        tl, tt, tr, tb = self.track_box
+        gray = cv2.cvtColor(frame[tt:tb, tl:tr], cv2.COLOR_BGR2GRAY)
         new_pts, status, _ = cv2.calcOpticalFlowPyrLK(self.old_gray, gray, self.features, None, **self.lk_params)
         good_new = new_pts[status == 1].reshape(-1, 2)
         self.features = good_new.reshape(-1, 1, 2)
         self.old_gray = gray
-        return float(np.mean(good_new[:, 1]))
+        return float(np.mean(good_new[:, 1])) + tt
+
+    def feature_count(self):
+        """
+        Jumlah fitur LK yang masih terlacak (None jika belum diinisialisasi).
+        """
+        return None if self.features is None else len(self.features)
+
+    def feature_points(self) -> np.ndarray:
+        """
+        Mengembalikan titik fitur LK saat ini dalam koordinat resolusi asli, array (N, 2).
+        """
+        if self.features is None:
+            return np.empty((0, 2), dtype=np.float32)
+        tl, tt = self.track_box[:2]
+        return self.features.reshape(-1, 2) + np.float32([tl, tt])
+
+
+class PhaseCorrRespTracker(RespTracker):
+    """
+    Pelacak respirasi alternatif berbasis phase correlation terhadap potongan ROI dada acuan.
+
+    ROI dada diperkecil ke lebar tetap (`target_width`). Setiap frame dibandingkan dengan
+    frame acuan (anchor), bukan frame sebelumnya, sehingga galat tidak terakumulasi sebagai
+    random walk. `cv2.phaseCorrelate` memberi pergeseran vertikal kasar, lalu diperhalus
+    dengan beberapa iterasi Gauss-Newton berbasis gradien (estimasi sub-piksel phase correlation
+    terlalu kecil untuk gerak napas). Anchor diperbarui setiap `reanchor_frames` frame atau saat
+    pergeseran melebihi `max_shift` × tinggi ROI, dan offset anchor ditambahkan ke keluaran.
+    Biaya per frame tetap dan tidak bergantung pada jumlah fitur. Antarmuka sama dengan
+    RespTracker: `initialize` / `initialize_from_shoulders` lalu `update(frame) -> float`.
+    """
+    def __init__(self, landmarker, x_size=100, y_size=100, shift_x=0, shift_y=0, ref_width=960,
+                 target_width=128, reanchor_frames=300, max_shift=0.1, refine_iters=2):
+        super().__init__(landmarker, x_size, y_size, shift_x, shift_y, ref_width, margin=0.0)
+        self.target_width = target_width
+        self.reanchor_frames = reanchor_frames
+        self.max_shift = max_shift
+        self.refine_iters = refine_iters
+        self.offset_y = 0.0
+        self._scale = 1.0
+        self._size = None
+        self._window = None
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        l, t, r, b = self.roi
+        small = cv2.resize(frame[t:b, l:r], self._size, interpolation=cv2.INTER_AREA)
+        return np.float32(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+
+    def _anchor(self, img: np.ndarray, offset: float):
+        """
+        Menjadikan img sebagai acuan baru dengan offset kumulatif `offset` (piksel ROI kecil).
+        """
+        self.old_gray = img
+        self._anchor_offset = offset
+        self._since_anchor = 0
+        # Gradien vertikal acuan (tanpa tepi) untuk penghalusan Gauss-Newton
+        gy = cv2.Sobel(img, cv2.CV_32F, 0, 1, ksize=3)[2:-2, 2:-2] / 8.0
+        self._grad = gy
+        self._grad_energy = float(np.sum(gy * gy)) + 1e-6
+
+    def _init_tracking(self, frame: np.ndarray):
+        l, t, r, b = self.roi
+        if r - l < 16 or b - t < 16:
+            raise RuntimeError("ROI dada terlalu kecil untuk phase correlation.")
+        self.track_box = self.roi
+        self._scale = max(1.0, (r - l) / float(self.target_width))
+        self._size = (max(16, int(round((r - l) / self._scale))), max(16, int(round((b - t) / self._scale))))
+        self._window = cv2.createHanningWindow(self._size, cv2.CV_32F)
+        self._anchor(self._prepare(frame), 0.0)
+        self.offset_y = 0.0
+
+    def _shift(self, cur: np.ndarray) -> float:
+        """
+        Pergeseran vertikal cur terhadap acuan (piksel ROI kecil).
+        """
+        (_, dy), _ = cv2.phaseCorrelate(self.old_gray, cur, self._window)
+        w, h = self._size
+        for _ in range(self.refine_iters):
+            back = cv2.warpAffine(cur, np.float32([[1, 0, 0], [0, 1, -dy]]), (w, h),
+                                  flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+            diff = back[2:-2, 2:-2] - self.old_gray[2:-2, 2:-2]
+            dy -= float(np.sum(self._grad * diff)) / self._grad_energy
+        return dy
+
+    def update(self, frame: np.ndarray) -> float:
+        """
+        Mengestimasi pergeseran vertikal ROI dada terhadap frame acuan.
+
+        Parameter:
+        - frame: frame gambar (resolusi asli)
+
+        Return:
+        - posisi vertikal pusat ROI ditambah pergeseran kumulatif (piksel resolusi asli)
+        """
+        cur = self._prepare(frame)
+        dy = self._shift(cur)
+        offset = self._anchor_offset + dy
+        self._since_anchor += 1
+        if self._since_anchor >= self.reanchor_frames or abs(dy) > self.max_shift * self._size[1]:
+            self._anchor(cur, offset)
+        self.offset_y = offset * (self.roi[3] - self.roi[1]) / float(self._size[1])
+        return (self.roi[1] + self.roi[3]) / 2.0 + self.offset_y
+
+    def feature_count(self):
+        """
+        Tidak memakai fitur titik; kualitas tidak bergantung pada jumlah fitur.
+        """
+        return None
+
+    def feature_points(self) -> np.ndarray:
+        """
+        Tidak ada titik fitur; mengembalikan array (0, 2).
+        """
+        return np.empty((0, 2), dtype=np.float32)
+
+
+# Pilihan pelacak respirasi: LK (akurat, biaya naik dengan jumlah fitur) atau
+# phase correlation (biaya tetap dan rendah, cocok untuk target latensi ketat)
+RESP_TRACKERS = {
+    "LK": RespTracker,
+    "Phase": PhaseCorrRespTracker,
+}
@@ -1,5 +1,99 @@
 import numpy as np
 from filter_utils import bandpass_filter
+from buffer_utils import as_signal_array
+
+RPPG_METHODS = ("POS", "CHROM", "GREEN", "PCA")
+
+
+def normalized_windows(X: np.ndarray, w: int) -> np.ndarray:
+    """
+    Membentuk jendela temporal geser dan menormalisasi tiap jendela dengan rerata kanalnya.
+    Jendela dimulai dari indeks 1 hingga f-w (sama dengan loop POS aslinya).
+
+    Parameter:
+    - X: array (..., 3, f) sinyal RGB
+    - w: panjang jendela (sampel)
+
+    Return:
+    - Cn: array (..., n, 3, w) jendela ternormalisasi, n = f - w
+    """
+    eps = 1e-9
+    win = np.lib.stride_tricks.sliding_window_view(X, w, axis=-1)[..., 1:, :]  # (..., 3, n, w)
+    win = np.moveaxis(win, -3, -2)                                             # (..., n, 3, w)
+    return win / (np.mean(win, axis=-1, keepdims=True) + eps)
+
+
+def _project(Cn: np.ndarray, method: str, pos=None) -> np.ndarray:
+    """
+    Menghitung proyeksi rPPG untuk setiap jendela ternormalisasi.
+
+    Parameter:
+    - Cn: array (..., n, 3, w) jendela ternormalisasi
+    - method: "POS", "CHROM", "GREEN", atau "PCA"
+    - pos: hasil proyeksi POS (..., n, w), dipakai untuk menyelaraskan tanda PCA
+
+    Return:
+    - h: array (..., n, w) sinyal per jendela dengan rerata nol
+    """
+    eps = 1e-9
+    R, G, B = Cn[..., 0, :], Cn[..., 1, :], Cn[..., 2, :]
+    if method == "POS":
+        S1 = G - B
+        S2 = -2 * R + G + B
+        alpha = np.std(S1, axis=-1, keepdims=True) / (np.std(S2, axis=-1, keepdims=True) + eps)
+        h = S1 + alpha * S2
+    elif method == "CHROM":
+        Xs = 3 * R - 2 * G
+        Ys = 1.5 * R + G - 1.5 * B
+        alpha = np.std(Xs, axis=-1, keepdims=True) / (np.std(Ys, axis=-1, keepdims=True) + eps)
+        h = Xs - alpha * Ys
+    elif method == "GREEN":
+        h = -G
+    elif method == "PCA":
+        Z = Cn - np.mean(Cn, axis=-1, keepdims=True)
+        cov = Z @ np.swapaxes(Z, -1, -2)                   # (..., n, 3, 3)
+        _, vecs = np.linalg.eigh(cov)
+        h = np.einsum("...c,...cw->...w", vecs[..., :, -1], Z)   # komponen utama
+        # Tanda eigenvector tidak unik: selaraskan dengan POS agar overlap-add konsisten
+        ref = pos if pos is not None else _project(Cn, "POS")
+        sign = np.sign(np.sum(h * ref, axis=-1, keepdims=True))
+        h = h * np.where(sign == 0, 1.0, sign)
+    else:
+        raise ValueError(f"Metode rPPG tidak dikenal: {method}")
+    return h - np.mean(h, axis=-1, keepdims=True)
+
+
+def rppg_engine(X: np.ndarray, fps: float, methods=RPPG_METHODS) -> np.ndarray:
+    """
+    Mesin rPPG multi-algoritma: normalisasi jendela dilakukan sekali, lalu seluruh
+    proyeksi (POS, CHROM, GREEN, PCA) dihitung dari jendela yang sama secara vektorisasi
+    dan digabung dengan overlap-add.
+
+    Parameter:
+    - X: array (..., 3, f) sinyal RGB
+    - fps: frame per second (sampling rate)
+    - methods: daftar nama metode
+
+    Return:
+    - H: array (len(methods), ..., f) sinyal rPPG mentah per metode
+    """
+    X = np.asarray(X, dtype=float)
+    f = X.shape[-1]
+    w = int(1.6 * fps)
+    H = np.zeros((len(methods),) + X.shape[:-2] + (f,))
+    if f <= w:
+        return H
+
+    Cn = normalized_windows(X, w)
+    starts = np.arange(1, f - w + 1)
+    pos = _project(Cn, "POS") if "POS" in methods or "PCA" in methods else None
+    for k, method in enumerate(methods):
+        h = pos if method == "POS" else _project(Cn, method, pos=pos)   # (..., n, w)
+        # Overlap-add: tiap offset j berisi indeks unik sehingga += aman tanpa np.add.at
+        for j in range(w):
+            H[k][..., starts + j] += h[..., j]
+    return H
+
 
 def cpu_POS(X: np.ndarray, fps: float) -> np.ndarray:
     """
@@ -12,48 +106,71 @@ def cpu_POS(X: np.ndarray, fps: float) -> np.ndarray:
     Return:
     - H: array (e, f) hasil estimasi sinyal POS
     """
-    eps = 1e-9
-    e, c, f = X.shape
-    w = int(1.6 * fps)
+    return rppg_engine(X, fps, methods=("POS",))[0]
 
-    P = np.array([[0, 1, -1], [-2, 1, 1]])
-    Q = np.stack([P]*e, axis=0)  # shape (e,2,3)
-    H = np.zeros((e, f))
-
-    for n in range(w, f):
-        m = n - w + 1
-        Cn = X[:, :, m:n+1]                      # (e,3,w)
-        M = 1.0 / (np.mean(Cn, axis=2) + eps)    # (e,3)
-        Cn = Cn * M[:, :, None]                  # Normalized (e,3,w)
-        S = np.tensordot(Q, Cn, axes=([2],[1]))  # (e,2,w)
-
-        Hnm = np.zeros((e, w))
-        for i in range(e):
-            S1, S2 = S[i, :, :]  # (2,w)
-            alpha = np.std(S1) / (np.std(S2) + eps)
-            Hn = S1 + alpha * S2
-            Hnm[i] = Hn - np.mean(Hn)
-
-        H[:, m:n+1] += Hnm
-    return H
+
+class StreamingRPPG:
+    """
+    rPPG streaming: setiap sampel RGB baru memproses satu jendela (biaya O(w), tidak bergantung
+    panjang riwayat) dan menambahkannya ke akumulator overlap-add. Sampel keluaran menjadi
+    final setelah seluruh jendela yang mencakupnya diproses (latensi w sampel).
+    Sampel masukan harus berjarak seragam 1/fps (lihat `StreamingResampler`).
+
+    Parameter:
+    - fps: laju sampel masukan (Hz)
+    - method: nama metode ("POS", "CHROM", "GREEN", "PCA"), sama dengan `extract_rppg`
+    """
+    def __init__(self, fps: float, method: str = "POS"):
+        if method not in RPPG_METHODS:
+            raise ValueError(f"Metode rPPG tidak dikenal: {method}")
+        self.method = method
+        self.w = int(1.6 * fps)
+        self.rgb = np.zeros((3, self.w))
+        self.times = np.zeros(self.w)
+        self.acc = np.zeros(self.w)
+        self.count = 0
+
+    def update(self, rgb, t: float):
+        """
+        Menambahkan satu sampel RGB.
+
+        Return:
+        - (timestamp, nilai) sampel POS yang sudah final, atau None selama pengisian awal
+        """
+        out = (self.times[0], self.acc[0]) if self.count >= self.w else None
+        self.rgb[:, :-1] = self.rgb[:, 1:]
+        self.rgb[:, -1] = rgb
+        self.times[:-1] = self.times[1:]
+        self.times[-1] = t
+        self.acc[:-1] = self.acc[1:]
+        self.acc[-1] = 0.0
+        self.count += 1
+        if self.count >= self.w:
+            eps = 1e-9
+            Cn = self.rgb / (np.mean(self.rgb, axis=-1, keepdims=True) + eps)
+            self.acc += _project(Cn, self.method)
+        return out
 
 
-def extract_rppg(rgb_buffer: np.ndarray, fps: float,
+def extract_rppg(rgb_buffer, fps: float,
                  lowcut: float = 0.8, highcut: float = 2.5,
-                 filter_order: int = 5) -> np.ndarray:
+                 filter_order: int = 5, method="POS") -> np.ndarray:
     """
-    Ekstraksi sinyal rPPG dari buffer RGB menggunakan metode POS dan filter bandpass.
+    Ekstraksi sinyal rPPG dari buffer RGB menggunakan metode POS (atau metode lain) dan filter bandpass.
 
     Parameter:
-    - rgb_buffer: array (3, f), sinyal RGB
+    - rgb_buffer: array (3, f) atau RingBuffer 3 kanal, sinyal RGB
     - fps: frame per second
     - lowcut, highcut: batas frekuensi filter bandpass
     - filter_order: orde filter
+    - method: nama metode ("POS", "CHROM", "GREEN", "PCA") atau daftar metode
 
     Return:
-    - rppg_filtered: sinyal rPPG yang telah difilter
+    - rppg_filtered: sinyal rPPG yang telah difilter, array (f,) untuk satu metode
+      atau (jumlah metode, f) untuk daftar metode
     """
-    # tambahkan dim estimator=1
-    sig = rgb_buffer[np.newaxis, ...]         # (1,3,f)
-    raw = cpu_POS(sig, fps=fps).flatten()     # (f,)
-    return bandpass_filter(raw, lowcut, highcut, fs=fps, order=filter_order)
+    rgb = as_signal_array(rgb_buffer)                              # (3,f)
+    methods = (method,) if isinstance(method, str) else tuple(method)
+    raw = rppg_engine(rgb, fps=fps, methods=methods)               # (A,f)
+    filtered = bandpass_filter(raw, lowcut, highcut, fs=fps, order=filter_order)
+    return filtered[0] if isinstance(method, str) else filtered
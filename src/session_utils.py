@@ -0,0 +1,216 @@
+import os
+import json
+import cv2
+import numpy as np
+
+from rppg_utils import extract_rppg
+from resp_utils import RESP_TRACKERS
+from filter_utils import bandpass_filter, resample_uniform, min_filter_length
+from frame_utils import face_roi
+
+VIDEO_NAME = "video.avi"
+CACHE_NAME = "cache.npz"
+
+
+class SessionRecorder:
+    """
+    Menyimpan sesi rekaman sebagai bundle yang dapat diputar ulang (replay):
+    video terkompresi, timestamp per frame, serta cache deteksi wajah, landmark bahu,
+    rata-rata RGB ROI, nilai respirasi pelacak, dan trek fitur LK.
+
+    Parameter:
+    - path: direktori tujuan bundle
+    - fps: frame rate nominal untuk header video
+    - fourcc: kode codec OpenCV (default MJPG, kompresi intra-frame agar warna ROI terjaga)
+    """
+    def __init__(self, path: str, fps: float = 30.0, fourcc: str = "MJPG"):
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.writer = None
+        self.timestamps = []
+        self.face_boxes = []
+        self.shoulders = []
+        self.rgb_means = []
+        self.resp = []
+        self.track_points = []
+        self.track_offsets = [0]
+        os.makedirs(path, exist_ok=True)
+
+    def add_frame(self, frame: np.ndarray, timestamp: float, face_box=None,
+                  shoulders=None, rgb_mean=None, features=None, resp=None):
+        """
+        Menambahkan satu frame beserta hasil inferensinya ke bundle.
+
+        Parameter:
+        - frame: frame BGR resolusi asli
+        - timestamp: waktu tangkap (detik)
+        - face_box: (x, y, w, h) wajah dalam piksel asli, None jika tidak terdeteksi
+        - shoulders: [(x_kiri, y_kiri), (x_kanan, y_kanan)] piksel asli, None jika tidak ada
+        - rgb_mean: rata-rata (R, G, B) ROI yang dipakai saat rekaman, None jika tidak ada
+        - features: titik fitur LK (N, 2) dalam koordinat asli, None jika belum ada
+        - resp: nilai keluaran pelacak respirasi pada frame ini, None jika tidak diperbarui
+          (satu-satunya data respirasi untuk pelacak tanpa titik fitur, mis. "Phase")
+        """
+        if self.writer is None:
+            h, w = frame.shape[:2]
+            self.writer = cv2.VideoWriter(os.path.join(self.path, VIDEO_NAME),
+                                          cv2.VideoWriter_fourcc(*self.fourcc), self.fps, (w, h))
+        self.writer.write(frame)
+        self.timestamps.append(timestamp)
+        self.face_boxes.append(face_box if face_box is not None else (np.nan,) * 4)
+        self.shoulders.append(shoulders if shoulders is not None else ((np.nan, np.nan),) * 2)
+        self.rgb_means.append(rgb_mean if rgb_mean is not None else (np.nan,) * 3)
+        self.resp.append(resp if resp is not None else np.nan)
+        if features is not None and len(features):
+            pts = np.asarray(features, dtype=np.float32).reshape(-1, 2)
+            self.track_points.append(pts)
+            self.track_offsets.append(self.track_offsets[-1] + len(pts))
+        else:
+            self.track_offsets.append(self.track_offsets[-1])
+
+    def close(self):
+        """
+        Menutup video dan menulis cache inferensi ke `cache.npz`.
+        """
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+        points = np.concatenate(self.track_points) if self.track_points else np.empty((0, 2), np.float32)
+        np.savez_compressed(
+            os.path.join(self.path, CACHE_NAME),
+            timestamps=np.asarray(self.timestamps, dtype=float),
+            face_boxes=np.asarray(self.face_boxes, dtype=float).reshape(-1, 4),
+            shoulders=np.asarray(self.shoulders, dtype=float).reshape(-1, 2, 2),
+            rgb_means=np.asarray(self.rgb_means, dtype=float).reshape(-1, 3),
+            resp=np.asarray(self.resp, dtype=float),
+            track_points=points,
+            track_offsets=np.asarray(self.track_offsets, dtype=np.int64),
+            meta=json.dumps({"fps": self.fps, "fourcc": self.fourcc}),
+        )
+
+
+def load_session(path: str) -> dict:
+    """
+    Membaca cache inferensi sebuah bundle sesi.
+
+    Return:
+    - dict berisi timestamps, face_boxes, shoulders, rgb_means, resp, track_points,
+      track_offsets, meta, dan video (path file video)
+    """
+    with np.load(os.path.join(path, CACHE_NAME)) as data:
+        session = {k: data[k] for k in data.files}
+    if "resp" not in session:
+        # Bundle lama belum menyimpan nilai respirasi per frame
+        session["resp"] = np.full(len(session["timestamps"]), np.nan)
+    session["meta"] = json.loads(str(session["meta"]))
+    session["video"] = os.path.join(path, VIDEO_NAME)
+    return session
+
+
+def cached_track_signal(session: dict):
+    """
+    Menghitung sinyal respirasi (rata-rata y fitur LK) langsung dari trek yang tersimpan,
+    tanpa mendekode video maupun menjalankan Optical Flow.
+
+    Return:
+    - t: timestamp frame yang memiliki fitur
+    - resp: rata-rata posisi y per frame
+    """
+    pts, off = session["track_points"], session["track_offsets"]
+    counts = np.diff(off)
+    valid = counts > 0
+    sums = np.add.reduceat(pts[:, 1], off[:-1][valid]) if pts.size else np.empty(0)
+    return session["timestamps"][valid], sums / counts[valid]
+
+
+def replay_session(path: str, fs: float = 30.0,
+                   lowcut_rppg: float = 0.8, highcut_rppg: float = 2.5, filter_order: int = 5,
+                   lowcut_resp: float = 0.1, highcut_resp: float = 0.7,
+                   roi_div: int = None, resp_params: dict = None, resp_method: str = "LK") -> dict:
+    """
+    Memutar ulang bundle sesi dan menganalisis ulang sinyal tanpa inferensi MediaPipe.
+
+    Parameter:
+    - path: direktori bundle
+    - fs: laju sampling timebase seragam untuk analisis
+    - lowcut_rppg, highcut_rppg, filter_order: parameter filter rPPG
+    - lowcut_resp, highcut_resp: parameter filter respirasi
+    - roi_div: jika diisi, ROI wajah dihitung ulang dari bounding box tersimpan
+      (setengah sisi = min(w, h) // roi_div); jika None, rata-rata RGB tersimpan dipakai
+    - resp_params: jika diisi (argumen RespTracker, mis. x_size/y_size/shift_y), Optical Flow
+      dijalankan ulang dari landmark bahu tersimpan; jika None, trek LK tersimpan dipakai,
+      atau nilai respirasi per frame yang tersimpan jika bundle tidak memiliki trek
+    - resp_method: pelacak yang dipakai saat resp_params diisi ("LK" atau "Phase")
+
+    Return:
+    - dict berisi t_rppg, rppg, t_resp, resp (sinyal hasil filter pada timebase seragam);
+      pasangan t_rppg/rppg atau t_resp/resp kosong jika sinyalnya terlalu pendek untuk difilter
+    """
+    session = load_session(path)
+    ts = session["timestamps"]
+    rgb_means = session["rgb_means"]
+    decode = roi_div is not None or resp_params is not None
+
+    resp_t, resp_y = [], []
+    if decode:
+        cap = cv2.VideoCapture(session["video"])
+        tracker = RESP_TRACKERS[resp_method](None, **resp_params) if resp_params is not None else None
+        initialized = False
+        rgb_means = rgb_means.copy()
+        for i in range(len(ts)):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            box = session["face_boxes"][i]
+            if roi_div is not None and np.all(np.isfinite(box)):
+                l, t, r, b = face_roi(box.astype(int), frame.shape, div=roi_div)
+                if r > l and b > t:
+                    mean_bgr = cv2.mean(frame[t:b, l:r])[:3]
+                    rgb_means[i] = (mean_bgr[2], mean_bgr[1], mean_bgr[0])
+            if tracker is None:
+                continue
+            if initialized:
+                try:
+                    y = tracker.update(frame)
+                except Exception:
+                    y = np.nan
+                if np.isfinite(y):
+                    resp_t.append(ts[i])
+                    resp_y.append(y)
+                else:
+                    # Fitur LK hilang: inisialisasi ulang dari landmark bahu tersimpan
+                    initialized = False
+            if not initialized and np.all(np.isfinite(session["shoulders"][i])):
+                try:
+                    tracker.initialize_from_shoulders(frame, session["shoulders"][i])
+                    initialized = True
+                except RuntimeError:
+                    pass
+        cap.release()
+
+    if resp_params is None:
+        if session["track_points"].size:
+            resp_t, resp_y = cached_track_signal(session)
+        else:
+            valid = np.isfinite(session["resp"])
+            resp_t, resp_y = ts[valid], session["resp"][valid]
+
+    valid = np.all(np.isfinite(rgb_means), axis=1)
+    t_rppg, rgb_uniform = resample_uniform(rgb_means[valid].T, ts[valid], fs)
+    if rgb_uniform.shape[-1] >= min_filter_length(filter_order):
+        rppg = extract_rppg(rgb_uniform, fps=fs, lowcut=lowcut_rppg, highcut=highcut_rppg,
+                            filter_order=filter_order)
+    else:
+        t_rppg, rppg = np.empty(0), np.empty(0)
+    t_resp, resp_uniform = resample_uniform(np.asarray(resp_y, dtype=float), resp_t, fs)
+    if resp_uniform.size >= min_filter_length():
+        resp = bandpass_filter(resp_uniform, lowcut_resp, highcut_resp, fs=fs)
+    else:
+        t_resp, resp = np.empty(0), np.empty(0)
+    return {
+        "t_rppg": t_rppg,
+        "rppg": rppg,
+        "t_resp": t_resp,
+        "resp": resp,
+    }